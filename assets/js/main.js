@@ -53,6 +53,114 @@ const observer = new IntersectionObserver((entries) => {
 
 document.querySelectorAll('.fade-in').forEach(el => observer.observe(el));
 
+// Service areas, compiled by sitebuild/service_areas.py. The layout
+// inlines them as window.serviceAreas: the sorted [start, end] zip
+// intervals while they're small, otherwise just the version hash and
+// content-hashed URL of the 12.5 KB bitmap (bit n set = zip n served),
+// which is fetched once and kept in localStorage until the hash changes.
+const SERVICE_AREAS_KEY = 'serviceAreas';
+let serviceAreaLookup = null;
+
+function readStoredServiceAreas(version) {
+    try {
+        const stored = JSON.parse(localStorage.getItem(SERVICE_AREAS_KEY));
+        if (!stored || stored.version !== version || typeof stored.bitmap !== 'string') {
+            return null;
+        }
+        return Uint8Array.from(atob(stored.bitmap), char => char.charCodeAt(0));
+    } catch (error) {
+        return null;
+    }
+}
+
+function storeServiceAreas(version, bitmap) {
+    try {
+        let binary = '';
+        for (const byte of bitmap) {
+            binary += String.fromCharCode(byte);
+        }
+        localStorage.setItem(SERVICE_AREAS_KEY, JSON.stringify({ version, bitmap: btoa(binary) }));
+    } catch (error) {
+        // Storage full or disabled; the in-memory copy still works
+    }
+}
+
+function bitmapHas(bitmap, zip) {
+    return (bitmap[zip >> 3] & (1 << (zip & 7))) !== 0;
+}
+
+// Resolves to a function telling whether a zip (as a number) is served
+function loadServiceAreas() {
+    if (!serviceAreaLookup) {
+        const index = window.serviceAreas || {};
+        const stored = !index.intervals && index.version && readStoredServiceAreas(index.version);
+        if (index.intervals) {
+            serviceAreaLookup = Promise.resolve(zip => intervalsHave(index.intervals, zip));
+        } else if (stored) {
+            serviceAreaLookup = Promise.resolve(zip => bitmapHas(stored, zip));
+        } else {
+            serviceAreaLookup = fetch(index.url || '/service-areas/all.bin')
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP ${response.status}`);
+                    }
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    const bitmap = new Uint8Array(buffer);
+                    if (index.version) {
+                        storeServiceAreas(index.version, bitmap);
+                    }
+                    return zip => bitmapHas(bitmap, zip);
+                })
+                .catch(error => {
+                    // Don't cache failures, so the next check retries
+                    serviceAreaLookup = null;
+                    throw error;
+                });
+        }
+    }
+    return serviceAreaLookup;
+}
+
+function intervalsHave(intervals, zip) {
+    let low = 0;
+    let high = intervals.length - 1;
+    while (low <= high) {
+        const middle = (low + high) >> 1;
+        if (zip < intervals[middle][0]) {
+            high = middle - 1;
+        } else if (zip > intervals[middle][1]) {
+            low = middle + 1;
+        } else {
+            return true;
+        }
+    }
+    return false;
+}
+
+// sitebuild/nearest.py writes nearest/<prefix>.json with the closest
+// served zip and distance for nearby unserved zips. The index says
+// whether it ran, so sites without a centroid table skip the request.
+const nearestServedFiles = new Map();
+
+function loadNearestServed(zip) {
+    if (!(window.serviceAreas || {}).nearest) {
+        return Promise.resolve(null);
+    }
+    const prefix = zip.slice(0, 3);
+    if (!nearestServedFiles.has(prefix)) {
+        nearestServedFiles.set(prefix, fetch(`/service-areas/nearest/${prefix}.json`)
+            .then(response => (response.ok ? response.json() : null))
+            // The distance is a nice-to-have; never fail the check over it
+            .catch(() => {
+                nearestServedFiles.delete(prefix);
+                return null;
+            }));
+    }
+    return nearestServedFiles.get(prefix).then(nearest => (nearest && nearest[zip]) || null);
+}
+
 // Zip code checker
 function checkZip() {
     const zipInput = document.getElementById('zipInput');
@@ -66,19 +174,24 @@ function checkZip() {
         return;
     }
 
-    // Load service areas from Jekyll data
-    fetch('/content/service-areas.json')
-        .then(response => response.json())
-        .then(data => {
-            const serviceZips = data.zip_codes || [];
-            const isServed = serviceZips.some(item => item.zip === zip);
+    // Look the zip up in the (memoised) service area index
+    loadServiceAreas()
+        .then(served => {
+            const isServed = served(parseInt(zip, 10));
 
             if (isServed) {
                 zipResult.className = 'success';
                 zipResult.innerHTML = '🎉 Great news! We service your area.<br><a href="#signup" style="color: inherit; font-weight: bold;">Sign up now!</a>';
             } else {
-                zipResult.className = 'error';
-                zipResult.innerHTML = 'Sorry, we don\'t service this area yet.<br>Join our waitlist to be notified when we expand!';
+                return loadNearestServed(zip).then(nearest => {
+                    let distance = '';
+                    if (nearest) {
+                        const miles = Math.max(1, Math.round(nearest[1]));
+                        distance = ` We're only ${miles === 1 ? 'a mile' : `${miles} miles`} away (we serve ${nearest[0]}).`;
+                    }
+                    zipResult.className = 'error';
+                    zipResult.innerHTML = `Sorry, we don't service this area yet.${distance}<br>Join our waitlist to be notified when we expand!`;
+                });
             }
         })
         .catch(error => {
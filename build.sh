@@ -0,0 +1,26 @@
+#!/bin/bash
+# DeLitterUp Website - Production Build
+# Generates the build-time data, runs Jekyll, then optimises _site/.
+# Extra arguments are passed to `jekyll build` (e.g. --drafts).
+
+set -e
+cd "$(dirname "$0")"
+
+# Stop before building if any content breaks the CMS field definitions
+python3 -m sitebuild.validate
+
+echo "📦 Preparing build data..."
+python3 -m sitebuild.bundle
+python3 -m sitebuild.service_areas
+python3 -m sitebuild.nearest
+python3 -m sitebuild.images
+
+echo "🔨 Building site..."
+bundle install
+bundle exec jekyll build "$@"
+
+echo "⚡ Optimising _site/..."
+python3 -m sitebuild.purge --minify
+python3 -m sitebuild.critical
+python3 -m sitebuild.fingerprint
+python3 -m sitebuild.precompress
@@ -1,80 +1,299 @@
 #!/usr/bin/env python3
 """
 Convert JSON collection files to YAML with front matter for Jekyll
+(or back again with --to json)
 """
 
 import os
+import sys
 import json
+import time
+import argparse
+import tempfile
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from sitebuild.digests import DigestCache, file_digest
+from sitebuild.frontmatter import write_front_matter, parse_front_matter, read_front_matter
+from sitebuild.metrics import Metrics, Progress, profiled
 
 BASE_DIR = Path(__file__).parent
 
-def convert_json_to_yaml(json_file_path):
+# Digests of converted sources and their outputs, persisted between runs
+CACHE_PATH = BASE_DIR / '.convert-cache.json'
+
+# Collections to convert
+COLLECTIONS = [
+    'content/_steps',
+    'content/_features',
+    'content/_pricing',
+    'content/_benefits',
+    'content/_faq',
+    'content/_testimonials'
+]
+
+# Source and output extension for each target format
+FORMATS = {'yaml': ('.json', '.md'), 'json': ('.md', '.json')}
+
+verbose = False
+metrics = Metrics()
+stats = {'unchanged': 0}
+
+def log(message):
+    """Print a per-file message when running with --verbose"""
+    if verbose:
+        print(message)
+
+def write_verified(path, write, parse, expected):
+    """Write a file through a temp file and only move it into place if
+    parsing it back gives the expected data"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write(f)
+        with open(tmp_path, 'r', encoding='utf-8') as f:
+            if parse(f.read()) != expected:
+                raise ValueError(f"{path}: output doesn't round-trip to the source data")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def convert_json_to_yaml(json_file_path, keep_source=False):
     """Convert a JSON file to YAML format with front matter"""
-    with open(json_file_path, 'r') as f:
+    with open(json_file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-
-    # Create YAML front matter
-    yaml_content = "---\n"
-    for key, value in data.items():
-        if isinstance(value, list):
-            yaml_content += f"{key}:\n"
-            for item in value:
-                yaml_content += f"  - {json.dumps(item)}\n"
-        elif isinstance(value, str):
-            # Escape quotes in strings
-            value_escaped = value.replace('"', '\\"')
-            yaml_content += f'{key}: "{value_escaped}"\n'
-        elif isinstance(value, bool):
-            yaml_content += f"{key}: {str(value).lower()}\n"
-        else:
-            yaml_content += f"{key}: {value}\n"
-    yaml_content += "---\n"
+    if not isinstance(data, dict):
+        raise ValueError(f"{json_file_path}: expected a JSON object")
 
     # Write back to file (change extension to .md)
-    md_file_path = json_file_path.replace('.json', '.md')
-    with open(md_file_path, 'w') as f:
-        f.write(yaml_content)
+    md_file_path = str(Path(json_file_path).with_suffix('.md'))
+    write_verified(md_file_path, lambda f: write_front_matter(data, f),
+                   lambda text: parse_front_matter(text, md_file_path)[0], data)
+
+    log(f"✓ Converted {json_file_path} → {md_file_path}")
+
+    # Remove old JSON file, now that the output is known to be good
+    if not keep_source:
+        os.remove(json_file_path)
+        log(f"  Removed {json_file_path}")
+
+    return md_file_path
+
+def convert_yaml_to_json(md_file_path, keep_source=False):
+    """Convert a front matter file back to JSON"""
+    data, body = read_front_matter(md_file_path)
+    if body.strip():
+        raise ValueError(f"{md_file_path}: has content below the front matter, which JSON can't hold")
+
+    json_file_path = str(Path(md_file_path).with_suffix('.json'))
+    write_verified(json_file_path, lambda f: json.dump(data, f, indent=2), json.loads, data)
+
+    log(f"✓ Converted {md_file_path} → {json_file_path}")
+
+    if not keep_source:
+        os.remove(md_file_path)
+        log(f"  Removed {md_file_path}")
+
+    return json_file_path
+
+def convert_file(source, to_format='yaml', keep_source=False):
+    """Convert one file and return the digests needed for the cache"""
+    source_digest = file_digest(source)
+    convert = convert_json_to_yaml if to_format == 'yaml' else convert_yaml_to_json
+    output = convert(source, keep_source)
+    return {'source': source, 'source_digest': source_digest, 'output': output,
+            'output_digest': file_digest(output), 'bytes': os.path.getsize(output),
+            'error': None}
+
+def convert_file_safely(job):
+    """Convert one (source, to_format, keep_source) job, capturing errors"""
+    try:
+        return convert_file(*job)
+    except (OSError, ValueError, TypeError) as e:
+        return {'source': job[0], 'error': f"{type(e).__name__}: {e}"}
+
+def cache_key(path):
+    """Cache entries are keyed by path relative to the project root"""
+    try:
+        return Path(path).resolve().relative_to(BASE_DIR.resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+def is_up_to_date(cache, source, output):
+    """Check whether source was already converted to an untouched output"""
+    key = cache_key(source)
+    entry = cache.get(key)
+    if not entry or entry.get('output') != cache_key(output):
+        return False
+    try:
+        return (cache.digest(key, source) == entry['digest']
+                and file_digest(output) == entry['output_digest'])
+    except OSError:
+        return False
 
-    print(f"✓ Converted {json_file_path} → {md_file_path}")
+def record_result(cache, result):
+    """Remember a successful conversion"""
+    key = cache_key(result['source'])
+    values = {'digest': result['source_digest'], 'output': cache_key(result['output']),
+              'output_digest': result['output_digest']}
+    if os.path.exists(result['source']):
+        cache.update(key, result['source'], **values)
+    else:
+        cache.set(key, **values)
+    metrics.record(Path(result['source']).parent.name, nbytes=result['bytes'])
 
-    # Remove old JSON file
-    os.remove(json_file_path)
-    print(f"  Removed {json_file_path}")
+def pending_sources(cache, dir_path, to_format, keep_source):
+    """Return the sources in a directory that need converting.
 
-def convert_directory(dir_path):
-    """Convert all JSON files in a directory"""
-    json_files = list(Path(dir_path).glob('*.json'))
-    if json_files:
+    Sources whose output is already up to date are skipped, and deleted
+    unless keep_source is set since the output already holds their data.
+    """
+    source_ext, output_ext = FORMATS[to_format]
+    pending = []
+    for source in sorted(Path(dir_path).glob(f'*{source_ext}')):
+        if is_up_to_date(cache, source, source.with_suffix(output_ext)):
+            stats['unchanged'] += 1
+            log(f"= Unchanged {source}")
+            if not keep_source:
+                os.remove(source)
+        else:
+            pending.append(str(source))
+    return pending
+
+def convert_directory(cache, dir_path, to_format='yaml', keep_source=False):
+    """Convert all changed files in a directory"""
+    sources = pending_sources(cache, dir_path, to_format, keep_source)
+    if sources:
         print(f"\n📁 Converting {dir_path}...")
-        for json_file in json_files:
-            convert_json_to_yaml(str(json_file))
+        progress = Progress(f"   {Path(dir_path).name}")
+        with metrics.step(Path(dir_path).name):
+            for source in sources:
+                result = convert_file(source, to_format, keep_source)
+                record_result(cache, result)
+                progress.advance(nbytes=result['bytes'])
+        progress.close()
 
-def main():
-    print("🔄 Converting JSON collection files to YAML format...\n")
-
-    # Collections to convert
-    collections = [
-        'content/_steps',
-        'content/_features',
-        'content/_pricing',
-        'content/_benefits',
-        'content/_faq',
-        'content/_testimonials'
-    ]
+def convert_collections(cache, collections, to_format='yaml', keep_source=False):
+    """Convert every collection directory that exists"""
+    for collection_dir in collections:
+        full_path = BASE_DIR / collection_dir
+        if full_path.exists():
+            convert_directory(cache, full_path, to_format, keep_source)
+        else:
+            print(f"⚠️  Directory not found: {collection_dir}")
 
+def convert_bulk(cache, collections, jobs, chunk_size=None, to_format='yaml', keep_source=False):
+    """Convert every collection at once on a process pool.
+
+    Files are handed to the workers in chunks to keep IPC overhead low.
+    Failures don't stop the run; they're returned as (path, error) pairs.
+    """
+    sources = []
     for collection_dir in collections:
         full_path = BASE_DIR / collection_dir
         if full_path.exists():
-            convert_directory(full_path)
+            sources.extend(pending_sources(cache, full_path, to_format, keep_source))
         else:
             print(f"⚠️  Directory not found: {collection_dir}")
+    if not sources:
+        return []
+
+    if not chunk_size:
+        chunk_size = max(1, min(256, len(sources) // (jobs * 4)))
+    print(f"\n📁 Converting {len(sources)} files with {jobs} processes "
+          f"(chunks of {chunk_size})...")
+
+    errors = []
+    progress = Progress("   converted")
+    start = time.perf_counter()
+    jobs_list = [(source, to_format, keep_source) for source in sources]
+    with metrics.step('bulk'), ProcessPoolExecutor(max_workers=jobs) as pool:
+        for result in pool.map(convert_file_safely, jobs_list, chunksize=chunk_size):
+            if result['error']:
+                errors.append((result['source'], result['error']))
+                progress.advance(files=0, errors=1)
+            else:
+                record_result(cache, result)
+                progress.advance(nbytes=result['bytes'])
+    progress.close()
+
+    elapsed = time.perf_counter() - start
+    converted = len(sources) - len(errors)
+    print(f"   ⚡ {converted} files in {elapsed:.2f}s "
+          f"({converted / elapsed if elapsed else 0:,.0f} files/s)")
+    return errors
+
+def run_conversion(cache, args):
+    """Convert all collections, returning any (path, error) failures"""
+    if args.bulk:
+        return convert_bulk(cache, COLLECTIONS, max(1, args.jobs), args.chunk_size,
+                            args.to, args.keep)
+    convert_collections(cache, COLLECTIONS, args.to, args.keep)
+    return []
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Convert JSON collection files to YAML front matter")
+    parser.add_argument('--to', choices=sorted(FORMATS), default='yaml',
+                        help="target format: yaml (JSON → .md, default) or json (.md → JSON)")
+    parser.add_argument('--keep', action='store_true',
+                        help="keep source files instead of deleting them once converted")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the digest cache and convert every file")
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help="print a line for every file converted")
+    parser.add_argument('--profile', nargs='?', const='convert-profile', metavar='PATH',
+                        help="profile the run and write PATH.json and PATH.pstats "
+                             "(default: convert-profile)")
+    parser.add_argument('--bulk', action='store_true',
+                        help="convert all collections on a process pool, collecting errors")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for --bulk (default: number of CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="files per work unit for --bulk (default: automatic)")
+    return parser.parse_args()
+
+def main():
+    global verbose
+    args = parse_args()
+    verbose = args.verbose
+
+    if args.to == 'yaml':
+        print("🔄 Converting JSON collection files to YAML format...\n")
+    else:
+        print("🔄 Converting YAML collection files back to JSON format...\n")
+
+    cache = DigestCache(CACHE_PATH)
+    if args.force:
+        cache.entries.clear()
+    try:
+        if args.profile:
+            with profiled(args.profile, metrics):
+                errors = run_conversion(cache, args)
+        else:
+            errors = run_conversion(cache, args)
+    finally:
+        cache.save()
+
+    if errors:
+        print(f"\n❌ {len(errors)} file(s) could not be converted:")
+        for path, error in errors:
+            print(f"   {path}: {error}")
+        metrics.print_report()
+        sys.exit(1)
 
     print("\n✅ Conversion complete!")
-    print("\nNext steps:")
-    print("  1. Review the converted .md files")
-    print("  2. Update admin/config.yml to use .md extension")
-    print("  3. Commit and push changes")
+    if stats['unchanged']:
+        print(f"\n📊 {stats['unchanged']} file(s) already up to date")
+    metrics.print_report()
+    if args.to == 'yaml':
+        print("\nNext steps:")
+        print("  1. Review the converted .md files")
+        print("  2. Update admin/config.yml to use .md extension")
+        print("  3. Commit and push changes")
 
 if __name__ == "__main__":
     main()
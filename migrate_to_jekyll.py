@@ -5,28 +5,289 @@ This script creates all necessary Jekyll files and populates content collections
 """
 
 import os
+import sys
 import json
+import difflib
+import hashlib
+import argparse
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sitebuild.datafiles import LINK_MODES, data_file_pairs, is_in_sync, materialise
+from sitebuild.digests import file_digest
+from sitebuild.files import write_temp, fsync_directory
+from sitebuild.metrics import Metrics, Progress, profiled
 
 # Base directory
 BASE_DIR = Path(__file__).parent
 
+# Content digests of every generated file, persisted between runs
+MANIFEST_PATH = BASE_DIR / '.migrate-manifest.json'
+
+manifest = {}
+incremental = True
+verbose = False
+link_mode = 'symlink'
+stats = {'written': 0, 'skipped': 0, 'bytes': 0}
+metrics = Metrics()
+
+# Pending filesystem changes collected by the create_* steps. Nothing
+# touches the disk until apply_write_plan() runs.
+write_plan = []
+
+# While steps run in parallel each one queues into its own plan, which
+# run_steps() merges into write_plan in declaration order
+step_plans = {}
+plan_lock = threading.Lock()
+current_step = threading.local()
+
+def log(message):
+    """Print a per-file message when running with --verbose"""
+    if verbose:
+        print(message)
+
+def load_manifest():
+    """Load the content-hash manifest from the previous run"""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest():
+    """Persist the content-hash manifest for the next run"""
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def manifest_key(path):
+    """Manifest entries are keyed by path relative to the project root"""
+    path = Path(path)
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+def is_unchanged(path, digest, size):
+    """Check whether path already holds content with the given digest"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != size:
+        return False
+
+    # Trust the manifest if the file hasn't been touched since we wrote it,
+    # otherwise hash what's on disk
+    entry = manifest.get(manifest_key(path))
+    if entry and entry['digest'] == digest and entry['mtime_ns'] == st.st_mtime_ns:
+        return True
+    return file_digest(path) == digest
+
+def record_manifest(path, digest):
+    """Remember the digest and stat of a file we own"""
+    st = os.stat(path)
+    manifest[manifest_key(path)] = {'digest': digest, 'size': st.st_size,
+                                    'mtime_ns': st.st_mtime_ns}
+
+def add_to_plan(entry):
+    """Queue a filesystem change for the step running on this thread"""
+    plan = getattr(current_step, 'plan', None)
+    with plan_lock:
+        (write_plan if plan is None else plan).append(entry)
+
+def is_planned(path):
+    """Check whether a pending plan entry will create path"""
+    with plan_lock:
+        plans = [write_plan] + list(step_plans.values())
+        return any(entry['path'] == Path(path) for plan in plans for entry in plan
+                   if entry['kind'] == 'file')
+
 def create_directory(path):
     """Create directory if it doesn't exist"""
-    Path(path).mkdir(parents=True, exist_ok=True)
-    print(f"✓ Created directory: {path}")
+    add_to_plan({'kind': 'dir', 'path': Path(path)})
 
 def write_file(path, content):
     """Write content to file"""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"✓ Created file: {path}")
+    add_to_plan({'kind': 'file', 'path': Path(path),
+                 'data': content.encode('utf-8'), 'label': 'file'})
 
 def write_json(path, data):
     """Write JSON data to file"""
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-    print(f"✓ Created JSON: {path}")
+    add_to_plan({'kind': 'file', 'path': Path(path),
+                 'data': json.dumps(data, indent=2).encode('utf-8'),
+                 'label': 'JSON'})
+
+def link_file(src, dest):
+    """Mirror src at dest using --link-mode, copying if links aren't supported"""
+    add_to_plan({'kind': 'link', 'path': Path(dest), 'src': Path(src)})
+
+def read_existing(path):
+    """Return the current text of path, or an empty list if it doesn't exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().splitlines(keepends=True)
+    except (OSError, UnicodeDecodeError):
+        return []
+
+def print_plan_diff():
+    """Print a unified diff of everything the plan would change"""
+    changed = 0
+    for entry in write_plan:
+        path = entry['path']
+        if entry['kind'] == 'file':
+            digest = hashlib.sha256(entry['data']).hexdigest()
+            if is_unchanged(path, digest, len(entry['data'])):
+                stats['skipped'] += 1
+                continue
+            new = entry['data'].decode('utf-8').splitlines(keepends=True)
+            for line in difflib.unified_diff(read_existing(path), new,
+                                             fromfile=f"a/{manifest_key(path)}",
+                                             tofile=f"b/{manifest_key(path)}"):
+                sys.stdout.write(line)
+                # Keep the output a valid patch when a file lacks a final newline
+                if not line.endswith('\n'):
+                    sys.stdout.write("\n\\ No newline at end of file\n")
+            changed += 1
+            stats['written'] += 1
+            stats['bytes'] += len(entry['data'])
+        elif entry['kind'] == 'link' and not is_in_sync(entry['src'], path):
+            action = 'relink' if os.path.lexists(path) else 'link'
+            print(f"+ {action} {manifest_key(path)} -> {manifest_key(entry['src'])}")
+            changed += 1
+    print(f"\n🔍 Dry run: {changed} change(s) pending, nothing written")
+
+def apply_write_plan():
+    """Apply the write plan atomically.
+
+    Every changed file is first written to a temp file next to its target.
+    Only once all of them are on disk are they renamed into place, so an
+    interrupted run never leaves a half-written file behind. Directory
+    fsyncs are batched and done once per directory at the end.
+    """
+    for entry in write_plan:
+        if entry['kind'] == 'dir':
+            entry['path'].mkdir(parents=True, exist_ok=True)
+
+    # Stage changed files
+    staged = []
+    try:
+        for entry in write_plan:
+            if entry['kind'] != 'file':
+                continue
+            path, data = entry['path'], entry['data']
+            digest = hashlib.sha256(data).hexdigest()
+            if incremental and is_unchanged(path, digest, len(data)):
+                stats['skipped'] += 1
+                record_manifest(path, digest)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staged.append((write_temp(path, data, sync=True), entry, digest))
+    except BaseException:
+        for tmp_path, _, _ in staged:
+            os.unlink(tmp_path)
+        raise
+
+    # Commit
+    progress = Progress("💾 Written")
+    touched_dirs = set()
+    for tmp_path, entry, digest in staged:
+        os.replace(tmp_path, entry['path'])
+        touched_dirs.add(entry['path'].parent)
+        record_manifest(entry['path'], digest)
+        stats['written'] += 1
+        stats['bytes'] += len(entry['data'])
+        metrics.record(entry.get('step', 'other'), nbytes=len(entry['data']))
+        progress.advance(nbytes=len(entry['data']))
+        log(f"✓ Created {entry['label']}: {entry['path']}")
+
+    for entry in write_plan:
+        if entry['kind'] != 'link':
+            continue
+        src, dest = entry['src'], entry['path']
+        if not src.exists():
+            continue
+        # materialise checks an existing dest by hash, so a stale copy
+        # left by an earlier --link-mode copy run gets replaced
+        method = materialise(src, dest, link_mode)
+        if method == 'unchanged':
+            continue
+        log(f"✓ Created {method}: {dest}")
+        metrics.record(entry.get('step', 'other'))
+        progress.advance()
+        touched_dirs.add(dest.parent)
+
+    for directory in sorted(touched_dirs):
+        fsync_directory(directory)
+    progress.close()
+    write_plan.clear()
+
+def run_step(step):
+    """Run a single step, collecting its writes into its own plan"""
+    print(f"\n{step['label']}...")
+    current_step.plan = []
+    try:
+        with metrics.step(step['name']):
+            step['func']()
+        for entry in current_step.plan:
+            entry['step'] = step['name']
+        with plan_lock:
+            step_plans[step['name']] = current_step.plan
+    finally:
+        current_step.plan = None
+
+def run_steps(steps, jobs=1):
+    """Run steps on a thread pool, respecting their dependencies.
+
+    Each step is a dict with a unique 'name', a 'label' to print, the
+    'func' to call and an optional 'after' list naming the steps that must
+    finish first. Independent steps run concurrently on up to jobs
+    threads. Once everything has run, the queued writes are merged into
+    write_plan in the order the steps were declared, so the resulting plan
+    doesn't depend on scheduling.
+    """
+    names = [step['name'] for step in steps]
+    for step in steps:
+        unknown = set(step.get('after', [])) - set(names)
+        if unknown:
+            raise ValueError(f"Step {step['name']} depends on unknown step(s): {', '.join(sorted(unknown))}")
+
+    pending = list(steps)
+    done = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for step in list(pending):
+                if done.issuperset(step.get('after', [])):
+                    running[pool.submit(run_step, step)] = step['name']
+                    pending.remove(step)
+            if not running:
+                raise ValueError(f"Circular step dependencies: {', '.join(s['name'] for s in pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()
+                done.add(name)
+
+    with plan_lock:
+        for name in names:
+            write_plan.extend(step_plans.pop(name))
+
+# Kept out of _site/: docs, tooling and the build's caches and profiles.
+# The checked-in _config.yml lists the same entries; change both together.
+JEKYLL_EXCLUDE = [
+    'Gemfile', 'Gemfile.lock', 'node_modules', 'vendor',
+    'migrate_to_jekyll.py', 'README.md', 'README-MIGRATION.md', 'QUICKSTART.md',
+    'MIGRATION-SUMMARY.md', 'NETLIFY-SETUP.md', 'NETLIFY-BUILD-FIX.md',
+    'ADMIN-SETUP-GITHUB.md', 'GITHUB-BACKEND-UPDATE.md', 'GITHUB-OAUTH-APP-SETUP.md',
+    'OAUTH-FIX-FINAL.md', 'ADMIN-BLANK-FIX.md', 'CURRENT-STATUS.md', 'STATUS-FINAL.md',
+    'FIX-SUMMARY.md', 'RUN-ME-FIRST.txt', 'sync-data.sh', 'convert-to-yaml.py',
+    'sitebuild', 'requirements.txt', 'serve.sh', 'build.sh',
+    '.migrate-manifest.json', '.convert-cache.json', '.bundle-cache.json',
+    '.images-cache.json', '.validate-cache.json', '.precompress-cache',
+    '.benchmark-history.json', 'migrate-profile.*', 'convert-profile.*',
+]
 
 def create_config_yml():
     """Create Jekyll _config.yml"""
@@ -67,14 +328,7 @@ plugins:
 
 # Exclude from build
 exclude:
-  - Gemfile
-  - Gemfile.lock
-  - node_modules
-  - vendor
-  - migrate_to_jekyll.py
-  - README.md
-  - admin/
-"""
+""" + ''.join(f"  - {name}\n" for name in JEKYLL_EXCLUDE)
     write_file(BASE_DIR / '_config.yml', config)
 
 def create_gemfile():
@@ -121,6 +375,7 @@ def create_layouts():
     {{ content }}
 
     <!-- JavaScript -->
+    {% if site.data.service_area_index %}<script>window.serviceAreas = {{ site.data.service_area_index | jsonify }};</script>{% endif %}
     <script src="{{ '/assets/js/main.js' | relative_url }}"></script>
 </body>
 </html>
@@ -844,6 +1099,114 @@ const observer = new IntersectionObserver((entries) => {
 
 document.querySelectorAll('.fade-in').forEach(el => observer.observe(el));
 
+// Service areas, compiled by sitebuild/service_areas.py. The layout
+// inlines them as window.serviceAreas: the sorted [start, end] zip
+// intervals while they're small, otherwise just the version hash and
+// content-hashed URL of the 12.5 KB bitmap (bit n set = zip n served),
+// which is fetched once and kept in localStorage until the hash changes.
+const SERVICE_AREAS_KEY = 'serviceAreas';
+let serviceAreaLookup = null;
+
+function readStoredServiceAreas(version) {
+    try {
+        const stored = JSON.parse(localStorage.getItem(SERVICE_AREAS_KEY));
+        if (!stored || stored.version !== version || typeof stored.bitmap !== 'string') {
+            return null;
+        }
+        return Uint8Array.from(atob(stored.bitmap), char => char.charCodeAt(0));
+    } catch (error) {
+        return null;
+    }
+}
+
+function storeServiceAreas(version, bitmap) {
+    try {
+        let binary = '';
+        for (const byte of bitmap) {
+            binary += String.fromCharCode(byte);
+        }
+        localStorage.setItem(SERVICE_AREAS_KEY, JSON.stringify({ version, bitmap: btoa(binary) }));
+    } catch (error) {
+        // Storage full or disabled; the in-memory copy still works
+    }
+}
+
+function bitmapHas(bitmap, zip) {
+    return (bitmap[zip >> 3] & (1 << (zip & 7))) !== 0;
+}
+
+// Resolves to a function telling whether a zip (as a number) is served
+function loadServiceAreas() {
+    if (!serviceAreaLookup) {
+        const index = window.serviceAreas || {};
+        const stored = !index.intervals && index.version && readStoredServiceAreas(index.version);
+        if (index.intervals) {
+            serviceAreaLookup = Promise.resolve(zip => intervalsHave(index.intervals, zip));
+        } else if (stored) {
+            serviceAreaLookup = Promise.resolve(zip => bitmapHas(stored, zip));
+        } else {
+            serviceAreaLookup = fetch(index.url || '/service-areas/all.bin')
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP ${response.status}`);
+                    }
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    const bitmap = new Uint8Array(buffer);
+                    if (index.version) {
+                        storeServiceAreas(index.version, bitmap);
+                    }
+                    return zip => bitmapHas(bitmap, zip);
+                })
+                .catch(error => {
+                    // Don't cache failures, so the next check retries
+                    serviceAreaLookup = null;
+                    throw error;
+                });
+        }
+    }
+    return serviceAreaLookup;
+}
+
+function intervalsHave(intervals, zip) {
+    let low = 0;
+    let high = intervals.length - 1;
+    while (low <= high) {
+        const middle = (low + high) >> 1;
+        if (zip < intervals[middle][0]) {
+            high = middle - 1;
+        } else if (zip > intervals[middle][1]) {
+            low = middle + 1;
+        } else {
+            return true;
+        }
+    }
+    return false;
+}
+
+// sitebuild/nearest.py writes nearest/<prefix>.json with the closest
+// served zip and distance for nearby unserved zips. The index says
+// whether it ran, so sites without a centroid table skip the request.
+const nearestServedFiles = new Map();
+
+function loadNearestServed(zip) {
+    if (!(window.serviceAreas || {}).nearest) {
+        return Promise.resolve(null);
+    }
+    const prefix = zip.slice(0, 3);
+    if (!nearestServedFiles.has(prefix)) {
+        nearestServedFiles.set(prefix, fetch(`/service-areas/nearest/${prefix}.json`)
+            .then(response => (response.ok ? response.json() : null))
+            // The distance is a nice-to-have; never fail the check over it
+            .catch(() => {
+                nearestServedFiles.delete(prefix);
+                return null;
+            }));
+    }
+    return nearestServedFiles.get(prefix).then(nearest => (nearest && nearest[zip]) || null);
+}
+
 // Zip code checker
 function checkZip() {
     const zipInput = document.getElementById('zipInput');
@@ -857,19 +1220,24 @@ function checkZip() {
         return;
     }
 
-    // Load service areas from Jekyll data
-    fetch('/content/service-areas.json')
-        .then(response => response.json())
-        .then(data => {
-            const serviceZips = data.zip_codes || [];
-            const isServed = serviceZips.some(item => item.zip === zip);
+    // Look the zip up in the (memoised) service area index
+    loadServiceAreas()
+        .then(served => {
+            const isServed = served(parseInt(zip, 10));
 
             if (isServed) {
                 zipResult.className = 'success';
                 zipResult.innerHTML = '🎉 Great news! We service your area.<br><a href="#signup" style="color: inherit; font-weight: bold;">Sign up now!</a>';
             } else {
-                zipResult.className = 'error';
-                zipResult.innerHTML = 'Sorry, we don\\'t service this area yet.<br>Join our waitlist to be notified when we expand!';
+                return loadNearestServed(zip).then(nearest => {
+                    let distance = '';
+                    if (nearest) {
+                        const miles = Math.max(1, Math.round(nearest[1]));
+                        distance = ` We're only ${miles === 1 ? 'a mile' : `${miles} miles`} away (we serve ${nearest[0]}).`;
+                    }
+                    zipResult.className = 'error';
+                    zipResult.innerHTML = `Sorry, we don't service this area yet.${distance}<br>Join our waitlist to be notified when we expand!`;
+                });
             }
         })
         .catch(error => {
@@ -1220,46 +1588,18 @@ def create_sample_content():
     write_json(BASE_DIR / 'content' / '_data' / 'settings' / 'general.json', settings)
 
 def create_data_symlinks():
-    """Create symlinks so Jekyll can find the data files"""
-    create_directory(BASE_DIR / '_data')
-    create_directory(BASE_DIR / '_data' / 'settings')
-
-    # Create symlink for hero data
-    hero_src = BASE_DIR / 'content' / 'hero.json'
-    hero_dest = BASE_DIR / '_data' / 'hero.json'
-    if hero_src.exists() and not hero_dest.exists():
-        try:
-            os.symlink(hero_src, hero_dest)
-            print(f"✓ Created symlink: {hero_dest}")
-        except:
-            # If symlink fails (Windows), copy the file instead
-            import shutil
-            shutil.copy(hero_src, hero_dest)
-            print(f"✓ Copied file: {hero_dest}")
-
-    # Create symlink for signup-form data
-    signup_src = BASE_DIR / 'content' / 'signup-form.json'
-    signup_dest = BASE_DIR / '_data' / 'signup-form.json'
-    if signup_src.exists() and not signup_dest.exists():
-        try:
-            os.symlink(signup_src, signup_dest)
-            print(f"✓ Created symlink: {signup_dest}")
-        except:
-            import shutil
-            shutil.copy(signup_src, signup_dest)
-            print(f"✓ Copied file: {signup_dest}")
-
-    # Create symlink for settings
-    settings_src = BASE_DIR / 'content' / '_data' / 'settings' / 'general.json'
-    settings_dest = BASE_DIR / '_data' / 'settings' / 'general.json'
-    if settings_src.exists() and not settings_dest.exists():
-        try:
-            os.symlink(settings_src, settings_dest)
-            print(f"✓ Created symlink: {settings_dest}")
-        except:
-            import shutil
-            shutil.copy(settings_src, settings_dest)
-            print(f"✓ Copied file: {settings_dest}")
+    """Link the CMS data files listed in admin/config.yml into _data/"""
+    try:
+        pairs = data_file_pairs(BASE_DIR, exists=lambda path: (BASE_DIR / path).exists()
+                                or is_planned(BASE_DIR / path))
+    except FileNotFoundError:
+        print("⚠️  admin/config.yml not found, no data files to link")
+        return
+
+    for src, dest in pairs:
+        src, dest = BASE_DIR / src, BASE_DIR / dest
+        if src.exists() or is_planned(src):
+            link_file(src, dest)
 
 def create_readme():
     """Create an updated README"""
@@ -1418,33 +1758,76 @@ Made with ❤️ for cat lovers
 """
     write_file(BASE_DIR / 'README-MIGRATION.md', readme)
 
+# Migration steps and the steps they depend on
+STEPS = [
+    {'name': 'config', 'label': "📝 Creating Jekyll Configuration", 'func': create_config_yml},
+    {'name': 'gemfile', 'label': "💎 Creating Gemfile", 'func': create_gemfile},
+    {'name': 'layouts', 'label': "🎨 Creating Layouts", 'func': create_layouts},
+    {'name': 'css', 'label': "💅 Creating CSS", 'func': create_css},
+    {'name': 'js', 'label': "⚡ Creating JavaScript", 'func': create_js},
+    {'name': 'content', 'label': "📦 Creating Sample Content", 'func': create_sample_content},
+    {'name': 'data', 'label': "🔗 Creating Data Symlinks", 'func': create_data_symlinks,
+     'after': ['content']},
+    {'name': 'readme', 'label': "📚 Creating README", 'func': create_readme},
+]
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Create Jekyll files for the DeLitterUp website")
+    parser.add_argument('--force', action='store_true',
+                        help="rewrite every file even if its content hash is unchanged")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print a unified diff of pending changes without writing anything")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of steps to run in parallel (default: number of CPUs)")
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help="print a line for every file written")
+    parser.add_argument('--link-mode', choices=('auto',) + LINK_MODES, default='symlink',
+                        help="how to mirror data files into _data/ (default: symlink)")
+    parser.add_argument('--profile', nargs='?', const='migrate-profile', metavar='PATH',
+                        help="profile the run and write PATH.json and PATH.pstats "
+                             "(default: migrate-profile); steps run serially")
+    return parser.parse_args()
+
+def migrate(args):
+    """Build the write plan and apply it (or print it with --dry-run)"""
+    run_steps(STEPS, 1 if args.profile else args.jobs)
+
+    if args.dry_run:
+        print_plan_diff()
+        return False
+
+    print("\n💾 Writing files...")
+    with metrics.step('write'):
+        apply_write_plan()
+        save_manifest()
+    return True
+
 def main():
     """Main migration function"""
+    global manifest, incremental, verbose, link_mode
+    args = parse_args()
+    link_mode = args.link_mode
+    incremental = not args.force
+    verbose = args.verbose
+    manifest = load_manifest()
+
     print("\n🚀 Starting Jekyll Migration for DeLitterUp Website\n")
     print("=" * 60)
 
-    print("\n📝 Creating Jekyll Configuration...")
-    create_config_yml()
-    create_gemfile()
-
-    print("\n🎨 Creating Layouts...")
-    create_layouts()
-
-    print("\n💅 Creating CSS and JavaScript...")
-    create_css()
-    create_js()
-
-    print("\n📦 Creating Sample Content...")
-    create_sample_content()
-
-    print("\n🔗 Creating Data Symlinks...")
-    create_data_symlinks()
-
-    print("\n📚 Creating README...")
-    create_readme()
+    if args.profile:
+        with profiled(args.profile, metrics):
+            applied = migrate(args)
+    else:
+        applied = migrate(args)
+    if not applied:
+        return
 
     print("\n" + "=" * 60)
     print("✅ Migration Complete!")
+    print(f"\n📊 Files written: {stats['written']}, unchanged: {stats['skipped']}, "
+          f"bytes written: {stats['bytes']:,}")
+    metrics.print_report()
     print("\n🎉 Next Steps:")
     print("   1. Run: bundle install")
     print("   2. Run: bundle exec jekyll serve")
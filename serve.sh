@@ -1,6 +1,10 @@
 #!/bin/bash
 # DeLitterUp Website - Development Server
-# Run this script to start the Jekyll development server
+# Run this script to start the development server: Jekyll rebuilds _site/
+# on every change and sitebuild.devserver serves it with live reload.
+
+set -e
+cd "$(dirname "$0")"
 
 export GEM_HOME="$HOME/.gem"
 export PATH="$HOME/.gem/bin:$PATH"
@@ -12,4 +16,16 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-bundle exec jekyll serve --livereload
+python3 -m sitebuild.bundle
+python3 -m sitebuild.service_areas
+
+# index.html reads the _data/<collection>.json snapshots, so keep them
+# current as collection documents are edited. Not --incremental: Jekyll
+# doesn't count _data files as page dependencies, so it would skip index.html
+python3 -m sitebuild.bundle --watch &
+BUNDLE_PID=$!
+bundle exec jekyll build --watch &
+JEKYLL_PID=$!
+trap 'kill $BUNDLE_PID $JEKYLL_PID 2>/dev/null' EXIT
+
+python3 -m sitebuild.devserver --port 4000
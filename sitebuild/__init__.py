@@ -0,0 +1,8 @@
+"""
+DeLitterUp Website - build tooling shared by the helper scripts
+"""
+
+from pathlib import Path
+
+# Project root (the directory holding _config.yml)
+BASE_DIR = Path(__file__).resolve().parent.parent
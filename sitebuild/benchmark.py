@@ -0,0 +1,380 @@
+"""
+End-to-end build benchmark on synthetic content
+
+Generates a throwaway site of any size and times the build pipeline on
+it, so slow paths show up before real content grows into them. The site
+starts as migrate_to_jekyll.py's create_sample_content, plus --faqs FAQs
+and --testimonials testimonials (queued through the same write plan),
+--zips service area zips and --images PNG uploads the testimonials use
+as photos. The layouts, includes, index.html and CMS config are copied
+from this project, and the collection folders link to content/, so the
+converted documents land where Jekyll and the CMS read them.
+
+Stages, each timed with its peak traced memory and the site size after it:
+
+    migrate    create_sample_content + synthetic records, data links
+    convert    convert-to-yaml.py: content JSON -> front matter
+    validate   sitebuild.validate against admin/config.yml
+    images     sitebuild.images (skipped without Pillow)
+    bundle     sitebuild.bundle and sitebuild.service_areas
+    render     sitebuild.preview of index.html
+
+Memory comes from tracemalloc, which slows Python code down and can't
+see worker processes; stages run serially unless --jobs says otherwise,
+and times are only comparable between runs made the same way. Each run
+is appended to a JSON history and compared with the last run that used
+the same sizes, flagging stages that got more than --threshold slower
+or hungrier.
+
+Usage: python3 -m sitebuild.benchmark [--faqs N] [--testimonials M] [--zips K] [--images J]
+                                      [--jobs N] [--history PATH] [--keep DIR] [--check]
+"""
+
+import io
+import os
+import sys
+import json
+import stat
+import time
+import shutil
+import struct
+import zlib
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import importlib.util
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime, timezone
+
+from . import BASE_DIR
+from .bundle import bundle_all
+from .digests import DigestCache
+from .files import atomic_write
+from .images import Image, build_images
+from .preview import DEFAULT_PAGES, OUTPUT_DIR, render_pages
+from .service_areas import compile_service_areas
+from .validate import validate_content
+
+HISTORY_NAME = '.benchmark-history.json'
+
+# Copied from the project into every generated site
+TEMPLATE_FILES = ('_config.yml', 'index.html', 'admin/config.yml')
+TEMPLATE_DIRS = ('_layouts', '_includes')
+
+# Collections create_sample_content writes under content/
+COLLECTIONS = ('steps', 'features', 'pricing', 'benefits', 'faq', 'testimonials')
+
+UPLOADS_DIR = 'images/uploads'
+IMAGE_SIZE = (640, 480)
+
+# Ignore changes smaller than this, however large in relative terms
+NOISE_SECONDS = 0.005
+NOISE_BYTES = 64 * 1024
+
+
+def load_script(file_name):
+    """Import one of the project's top-level scripts as a fresh module"""
+    path = BASE_DIR / file_name
+    spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so its functions can be handed to worker processes
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def placeholder_png(index, size=IMAGE_SIZE):
+    """A gradient PNG, different for every index, written without Pillow"""
+    width, height = size
+    shade = (index * 37) % 256
+    rows = (b'\x00' + bytes((x + shade) % 256 for x in range(width))) * height
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows, 6))
+            + chunk(b'IEND', b''))
+
+
+def synthetic_faq(index):
+    return {"question": f"Synthetic question {index}?",
+            "answer": f"Synthetic answer {index}. " + "Fresh litter, every week. " * (index % 5 + 1),
+            "order": 100 + index}
+
+
+def synthetic_testimonial(index, images):
+    testimonial = {"name": f"Customer {index}", "role": f"Cat owner #{index}",
+                   "text": f"Review number {index}. " + "Never scooping again. " * (index % 4 + 1),
+                   "rating": index % 5 + 1, "initials": f"C{index % 10}", "order": 100 + index}
+    if images:
+        testimonial["photo"] = f"/{UPLOADS_DIR}/bench-{index % images + 1}.png"
+    return testimonial
+
+
+def synthetic_zips(count):
+    """count distinct five-digit zips, every third one a gap so ranges don't all merge"""
+    zips, number = [], 10000
+    while len(zips) < count:
+        if number % 3:
+            zips.append({"zip": f"{number:05d}"})
+        number += 1
+    return zips
+
+
+def prepare_site(site_dir):
+    """Copy the templates into site_dir and link the collection folders to content/"""
+    site_dir = Path(site_dir)
+    for name in TEMPLATE_FILES:
+        (site_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(BASE_DIR / name, site_dir / name)
+    for name in TEMPLATE_DIRS:
+        if (BASE_DIR / name).is_dir():
+            shutil.copytree(BASE_DIR / name, site_dir / name)
+    for name in COLLECTIONS:
+        (site_dir / 'content' / f'_{name}').mkdir(parents=True, exist_ok=True)
+        os.symlink(Path('content') / f'_{name}', site_dir / f'_{name}')
+
+
+def migrate_stage(site_dir, params):
+    """Queue create_sample_content and the synthetic records, then write them"""
+    migrate = load_script('migrate_to_jekyll.py')
+    migrate.BASE_DIR = site_dir
+    migrate.MANIFEST_PATH = site_dir / '.migrate-manifest.json'
+    migrate.create_sample_content()
+    content = site_dir / 'content'
+    for index in range(1, params['faqs'] + 1):
+        migrate.write_json(content / '_faq' / f'bench-{index}.json', synthetic_faq(index))
+    for index in range(1, params['testimonials'] + 1):
+        migrate.write_json(content / '_testimonials' / f'bench-{index}.json',
+                           synthetic_testimonial(index, params['images']))
+    if params['zips']:
+        # Replaces the sample list; later plan entries win
+        migrate.write_json(content / 'service-areas.json', {"zip_codes": synthetic_zips(params['zips'])})
+    for index in range(1, params['images'] + 1):
+        migrate.add_to_plan({'kind': 'file', 'path': site_dir / UPLOADS_DIR / f'bench-{index}.png',
+                             'data': placeholder_png(index), 'label': 'image'})
+    migrate.create_data_symlinks()
+    migrate.apply_write_plan()
+
+
+def convert_stage(site_dir, params):
+    """Convert every content collection to front matter, as convert-to-yaml.py does"""
+    convert = load_script('convert-to-yaml.py')
+    convert.BASE_DIR = site_dir
+    cache = DigestCache(site_dir / '.convert-cache.json')
+    collections = [f'content/_{name}' for name in COLLECTIONS]
+    if params['jobs'] > 1:
+        errors = convert.convert_bulk(cache, collections, params['jobs'])
+    else:
+        errors = convert.convert_collections(cache, collections) or []
+    cache.save()
+    if errors:
+        raise RuntimeError(f"{len(errors)} file(s) could not be converted, e.g. {errors[0][0]}: {errors[0][1]}")
+
+
+def validate_stage(site_dir, params):
+    summary = validate_content(site_dir, jobs=params['jobs'], force=True)[1]
+    if summary['errors']:
+        raise RuntimeError(f"synthetic content failed validation with {summary['errors']} error(s)")
+
+
+def images_stage(site_dir, params):
+    summary = build_images(site_dir, jobs=params['jobs'], force=True)
+    if summary['errors']:
+        raise RuntimeError(f"{len(summary['errors'])} upload(s) could not be processed")
+
+
+def bundle_stage(site_dir, params):
+    bundle_all(site_dir, force=True)
+    compile_service_areas(site_dir)
+
+
+def render_stage(site_dir, params):
+    render_pages(DEFAULT_PAGES, site_dir, site_dir / OUTPUT_DIR)
+
+
+# (name, function, runs?) in pipeline order
+STAGES = [
+    ('migrate', migrate_stage, lambda: True),
+    ('convert', convert_stage, lambda: True),
+    ('validate', validate_stage, lambda: True),
+    ('images', images_stage, lambda: Image is not None),
+    ('bundle', bundle_stage, lambda: True),
+    ('render', render_stage, lambda: True),
+]
+
+
+def tree_size(directory):
+    """Total size of the regular files under directory, not following links"""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            st = os.lstat(os.path.join(root, name))
+            if stat.S_ISREG(st.st_mode):
+                total += st.st_size
+    return total
+
+
+def run_stage(func, site_dir, params, verbose=False):
+    """Run one stage; returns its seconds and peak traced memory"""
+    output = sys.stdout if verbose else io.StringIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            func(site_dir, params)
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(site_dir, params, verbose=False):
+    """Build a synthetic site in site_dir and measure every stage"""
+    site_dir = Path(site_dir)
+    prepare_site(site_dir)
+    stages = {}
+    for name, func, enabled in STAGES:
+        if not enabled():
+            stages[name] = None
+            continue
+        seconds, peak = run_stage(func, site_dir, params, verbose)
+        stages[name] = {'seconds': seconds, 'peak_memory_bytes': peak, 'site_bytes': tree_size(site_dir)}
+    output_bytes = sum((site_dir / OUTPUT_DIR / page).stat().st_size for page in DEFAULT_PAGES)
+    return {'stages': stages, 'output_bytes': output_bytes,
+            'total_seconds': sum(stage['seconds'] for stage in stages.values() if stage)}
+
+
+def git_commit():
+    """The checked-out commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def load_history(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return history if isinstance(history, list) else []
+
+
+def previous_run(history, params):
+    """The most recent run with the same sizes and settings"""
+    for run in reversed(history):
+        if run.get('params') == params:
+            return run
+    return None
+
+
+def regressions(run, baseline, threshold):
+    """[(stage, metric, before, after)] for every stage that got worse by more than threshold"""
+    found = []
+    metrics = (('seconds', NOISE_SECONDS), ('peak_memory_bytes', NOISE_BYTES))
+    for name, stage in run['stages'].items():
+        before = (baseline['stages'] or {}).get(name)
+        if not stage or not before:
+            continue
+        for metric, noise in metrics:
+            old, new = before.get(metric), stage[metric]
+            if old and new - old > noise and new > old * (1 + threshold):
+                found.append((name, metric, old, new))
+    return found
+
+
+def change(old, new):
+    if not old:
+        return ''
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def print_report(run, baseline):
+    """Print a per-stage table, with changes against baseline if there is one"""
+    print(f"\n⏱️  {'Stage':<9}  {'Time':>9}  {'':>5}  {'Peak memory':>12}  {'':>5}  {'Site size':>12}")
+    for name, stage in run['stages'].items():
+        if not stage:
+            print(f"    {name:<9}  {'skipped':>9}")
+            continue
+        before = ((baseline or {}).get('stages') or {}).get(name) or {}
+        print(f"    {name:<9}  {stage['seconds'] * 1000:>7.1f}ms  "
+              f"{change(before.get('seconds'), stage['seconds']):>5}  "
+              f"{stage['peak_memory_bytes']:>12,}  "
+              f"{change(before.get('peak_memory_bytes'), stage['peak_memory_bytes']):>5}  "
+              f"{stage['site_bytes']:>12,}")
+    print(f"    {'total':<9}  {run['total_seconds'] * 1000:>7.1f}ms  "
+          f"{change((baseline or {}).get('total_seconds'), run['total_seconds']):>5}")
+    print(f"\n📄 Rendered output: {run['output_bytes']:,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build pipeline on synthetic content")
+    parser.add_argument('--faqs', type=int, default=1000, help="synthetic FAQs (default: 1000)")
+    parser.add_argument('--testimonials', type=int, default=200,
+                        help="synthetic testimonials (default: 200)")
+    parser.add_argument('--zips', type=int, default=5000, help="service area zips (default: 5000)")
+    parser.add_argument('--images', type=int, default=20, help="uploaded images (default: 20)")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes for convert/validate/images (default: 1, so "
+                             "tracemalloc sees all the work)")
+    parser.add_argument('--history', default=str(BASE_DIR / HISTORY_NAME),
+                        help=f"JSON file runs are appended to (default: {HISTORY_NAME})")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown or memory growth reported as a regression (default: 0.2)")
+    parser.add_argument('--keep', metavar='DIR',
+                        help="build the site in DIR (which must not exist) and leave it there")
+    parser.add_argument('--check', action='store_true', help="exit 1 if any stage regressed")
+    parser.add_argument('--verbose', '-v', action='store_true', help="show each stage's own output")
+    args = parser.parse_args()
+
+    params = {'faqs': args.faqs, 'testimonials': args.testimonials, 'zips': args.zips,
+              'images': args.images, 'jobs': max(1, args.jobs)}
+    if any(value < 0 for value in params.values()):
+        parser.error("sizes can't be negative")
+
+    print(f"🏁 Benchmarking {params['faqs']} FAQs, {params['testimonials']} testimonials, "
+          f"{params['zips']} zips, {params['images']} images...")
+    if args.keep:
+        os.makedirs(args.keep)
+        run = run_benchmark(Path(args.keep).resolve(), params, args.verbose)
+    else:
+        with tempfile.TemporaryDirectory(prefix='sitebuild-bench-') as site_dir:
+            run = run_benchmark(Path(site_dir), params, args.verbose)
+    run = dict({'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': git_commit(), 'python': platform.python_version(),
+                'platform': platform.platform(), 'cpus': os.cpu_count(), 'params': params}, **run)
+
+    history = load_history(args.history)
+    baseline = previous_run(history, params)
+    print_report(run, baseline)
+    history.append(run)
+    atomic_write(args.history, (json.dumps(history, indent=2) + '\n').encode('utf-8'))
+    print(f"📚 Run {len(history)} recorded in {args.history}")
+
+    if baseline is None:
+        print("   No earlier run with these sizes to compare against")
+        return
+    found = regressions(run, baseline, args.threshold)
+    for name, metric, old, new in found:
+        what = (f"{old * 1000:.1f}ms -> {new * 1000:.1f}ms" if metric == 'seconds'
+                else f"{old:,} -> {new:,} bytes")
+        print(f"⚠️  {name}: {metric.replace('_', ' ')} {what} ({change(old, new)})")
+    if not found:
+        print(f"✅ No regressions against run from {baseline.get('timestamp')} ({baseline.get('commit')})")
+    elif args.check:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Bundle collections into pre-sorted _data snapshots
+
+Parses the front matter of every collection document once and writes
+_data/<collection>.json as a compact array already in display order, so
+index.html can loop over site.data.<collection> instead of sorting the
+collection on every Jekyll build. A snapshot is only rewritten when one
+of its input files changed. With --watch it keeps running and re-bundles
+after every settled burst of edits to the collection folders, so the
+snapshots index.html reads never go stale while developing.
+
+Usage: python3 -m sitebuild.bundle [--force] [--watch] [--debounce SECONDS]
+"""
+
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+from . import BASE_DIR
+from .collections import SORT_KEYS, load_config, collection_dirs, collection_files, sort_items
+from .digests import DigestCache
+from .files import atomic_write
+from .frontmatter import read_front_matter
+from .metrics import Metrics
+from .sync import make_watcher
+
+CACHE_NAME = '.bundle-cache.json'
+
+# Part of every inputs digest; bump when render_snapshot's output changes
+SNAPSHOT_FORMAT = 2
+
+
+def relative_key(path, base_dir):
+    """Cache key for a path: relative to the project root"""
+    return Path(path).relative_to(base_dir).as_posix()
+
+
+def inputs_digest(cache, paths, base_dir):
+    """Combined digest of a collection's file names and contents"""
+    sha = hashlib.sha256(f"format {SNAPSHOT_FORMAT}\n".encode('utf-8'))
+    for path in paths:
+        key = relative_key(path, base_dir)
+        digest = cache.digest(key, path)
+        cache.update(key, path, digest=digest)
+        sha.update(f"{key}\0{digest}\n".encode('utf-8'))
+    return sha.hexdigest()
+
+
+def render_snapshot(name, paths):
+    """Return the compact, sorted JSON snapshot of a collection"""
+    items = [read_front_matter(path)[0] for path in paths]
+    items = sort_items(items, SORT_KEYS.get(name, 'order'))
+    return json.dumps(items, ensure_ascii=False, separators=(',', ':'),
+                      sort_keys=True, default=str).encode('utf-8')
+
+
+def bundle_collection(name, directory, cache, base_dir=BASE_DIR, force=False):
+    """Write _data/<name>.json if its inputs changed.
+
+    Returns the number of bytes written (0 if the snapshot was current).
+    """
+    paths = collection_files(directory)
+    snapshot = Path(base_dir) / '_data' / f'{name}.json'
+    snapshot_key = relative_key(snapshot, base_dir)
+    digest = inputs_digest(cache, paths, base_dir)
+
+    entry = cache.get(snapshot_key)
+    if (not force and entry and entry.get('inputs') == digest
+            and cache.is_current(snapshot_key, snapshot)):
+        return 0
+
+    data = render_snapshot(name, paths)
+    atomic_write(snapshot, data)
+    cache.update(snapshot_key, snapshot, inputs=digest)
+    return len(data)
+
+
+def bundle_all(base_dir=BASE_DIR, force=False, metrics=None):
+    """Bundle every collection in _config.yml; returns {name: bytes written}"""
+    base_dir = Path(base_dir)
+    metrics = metrics or Metrics()
+    cache = DigestCache(base_dir / CACHE_NAME)
+    results = {}
+    try:
+        for name, directory in collection_dirs(load_config(base_dir), base_dir).items():
+            with metrics.step(name):
+                written = bundle_collection(name, directory, cache, base_dir, force)
+            if written:
+                metrics.record(name, nbytes=written)
+            results[name] = written
+    finally:
+        cache.save()
+    return results
+
+
+def print_results(results):
+    for name, written in results.items():
+        status = f"✓ _data/{name}.json ({written:,} bytes)" if written else f"= _data/{name}.json unchanged"
+        print(f"   {status}")
+
+
+def watch(base_dir=BASE_DIR, debounce=0.3):
+    """Bundle, then re-bundle after every settled burst of collection changes"""
+    base_dir = Path(base_dir)
+    print_results(bundle_all(base_dir))
+    trees = [directory for directory in collection_dirs(load_config(base_dir), base_dir).values()
+             if directory.is_dir()]
+    watcher = make_watcher([], trees)
+    print(f"👀 Watching {len(trees)} collections ({type(watcher).__name__}), Ctrl+C to stop")
+    try:
+        while True:
+            if not watcher.wait():
+                continue
+            # Debounce: wait until edits have stopped for a moment
+            while watcher.wait(debounce):
+                pass
+            results = bundle_all(base_dir)
+            if any(results.values()):
+                print_results({name: written for name, written in results.items() if written})
+            else:
+                print("= No collection changes")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write pre-sorted _data snapshots of the collections")
+    parser.add_argument('--force', action='store_true',
+                        help="rewrite every snapshot even if its inputs are unchanged")
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help="keep running and re-bundle whenever a collection document changes")
+    parser.add_argument('--debounce', type=float, default=0.3, metavar='SECONDS',
+                        help="quiet period to wait for after a change before bundling (default: 0.3)")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(debounce=args.debounce)
+        return
+
+    print("📦 Bundling collections into _data/...")
+    metrics = Metrics()
+    print_results(bundle_all(force=args.force, metrics=metrics))
+    metrics.print_report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Jekyll site configuration and collection loading
+"""
+
+from pathlib import Path
+
+from . import BASE_DIR
+from .frontmatter import read_front_matter, yaml
+
+# Field each collection is ordered by in index.html
+SORT_KEYS = {
+    'steps': 'step_number',
+    'features': 'order',
+    'pricing': 'order',
+    'benefits': 'order',
+    'faq': 'order',
+    'testimonials': 'order',
+}
+
+# Files in a collection directory that are documents
+COLLECTION_EXTENSIONS = ('.md', '.markdown', '.html')
+
+
+def load_config(base_dir=BASE_DIR):
+    """Load _config.yml"""
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read _config.yml (pip install pyyaml)")
+    with open(Path(base_dir) / '_config.yml', 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def collection_dirs(config, base_dir=BASE_DIR):
+    """Return {collection name: directory} for the collections in the config"""
+    root = Path(base_dir) / config.get('collections_dir', '')
+    collections = config.get('collections') or {}
+    if isinstance(collections, list):
+        collections = dict.fromkeys(collections, {})
+    return {name: root / f'_{name}' for name in collections}
+
+
+def collection_files(directory):
+    """Return a collection's document paths, in Jekyll's default (path) order"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(p for p in directory.iterdir()
+                  if p.suffix in COLLECTION_EXTENSIONS and not p.name.startswith('.'))
+
+
+def load_collection(directory):
+    """Read the front matter of every document in a collection"""
+    return [read_front_matter(path)[0] for path in collection_files(directory)]
+
+
+def sort_items(items, key):
+    """Sort like Jekyll's sort filter: by key, items without it first"""
+    def sort_key(item):
+        value = item.get(key)
+        return (value is not None, value)
+    try:
+        return sorted(items, key=sort_key)
+    except TypeError:
+        # Mixed types; compare as strings rather than fail the build
+        return sorted(items, key=lambda item: (item.get(key) is not None, str(item.get(key))))
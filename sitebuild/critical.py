@@ -0,0 +1,135 @@
+"""
+Inline the above-the-fold CSS into every built page
+
+For each page in _site/ this works out which rules of its local
+stylesheets apply to the content above the fold (everything up to the
+end of the first element with the fold class, by default the .hero
+section), inlines just those in a <style> in the head, and turns the
+stylesheet links (ours and Google Fonts) into non-blocking preloads
+with a <noscript> fallback. The first paint then needs no CSS request.
+
+Class names main.js adds at runtime are treated as present, so e.g.
+header.scrolled still applies before the full stylesheet arrives.
+
+Runs after `jekyll build`; pages already processed are left alone.
+
+Usage: python3 -m sitebuild.critical [--fold CLASS]
+"""
+
+import re
+import argparse
+from html import escape
+from pathlib import Path
+
+from . import BASE_DIR
+from .css import parse_stylesheet, serialize, filter_rules, html_usage, js_classes, selector_used
+from .files import atomic_write
+from .site import site_dir, base_url, html_pages, local_file
+
+FOLD_CLASS = 'hero'
+SCRIPT = 'assets/js/main.js'
+
+HEAD_END = re.compile(r'</head\s*>', re.I)
+LINK = re.compile(r'<link\b[^>]*>', re.I)
+ATTRIBUTE = re.compile(r'([^\s=/>]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+MARKER = 'data-critical'
+
+# Swaps a preloaded stylesheet in once it has arrived
+ONLOAD = "this.onload=null;this.rel='stylesheet'"
+
+
+def link_attributes(tag):
+    attrs = {}
+    for name, value in ATTRIBUTE.findall(tag[len('<link'):].rstrip('/>')):
+        attrs[name.lower()] = value.strip('"\'') if value else ''
+    return attrs
+
+
+def async_link(tag, attrs):
+    """Rewrite a stylesheet <link> as a preload, keeping the original for no-JS visitors"""
+    extra = ''.join(f' {name}="{escape(value)}"' if value else f' {name}'
+                    for name, value in attrs.items() if name not in ('rel', 'href', 'as', 'onload'))
+    return (f'<link rel="preload" href="{escape(attrs["href"])}" as="style"{extra} onload="{ONLOAD}">'
+            f'<noscript>{tag}</noscript>')
+
+
+def critical_css(stylesheet, usage):
+    """Minified subset of a parsed stylesheet that applies to usage"""
+    return serialize(filter_rules(stylesheet, lambda selector: selector_used(selector, usage)), minify=True)
+
+
+def process_page(path, directory, baseurl, script_classes, fold_class, stylesheets):
+    """Inline critical CSS into one page; returns (inlined bytes, full bytes) or None if skipped"""
+    html = path.read_text(encoding='utf-8')
+    head_end = HEAD_END.search(html)
+    if not head_end or MARKER in html[:head_end.start()]:
+        return None
+    usage, found = html_usage(html, stop_class=fold_class)
+    if not found:
+        return None
+    usage['classes'] |= script_classes
+
+    head = html[:head_end.start()]
+    links = []
+    for match in LINK.finditer(head):
+        attrs = link_attributes(match.group(0))
+        if attrs.get('rel', '').lower() == 'stylesheet' and attrs.get('href'):
+            links.append((match, attrs))
+    if not links:
+        return None
+
+    inline = []
+    full_size = 0
+    for _, attrs in links:
+        file = local_file(attrs['href'], directory, baseurl)
+        if file is None:
+            continue
+        if file not in stylesheets:
+            stylesheets[file] = parse_stylesheet(file.read_text(encoding='utf-8'))
+        full_size += file.stat().st_size
+        inline.append(critical_css(stylesheets[file], usage))
+    css = ''.join(inline)
+
+    # Rewrite back to front so earlier offsets stay valid
+    for index, (match, attrs) in reversed(list(enumerate(links))):
+        replacement = async_link(match.group(0), attrs)
+        if index == 0 and css:
+            replacement = f'<style {MARKER}>{css}</style>\n    {replacement}'
+        head = head[:match.start()] + replacement + head[match.end():]
+    atomic_write(path, (head + html[head_end.start():]).encode('utf-8'))
+    return len(css.encode('utf-8')), full_size
+
+
+def inline_critical_css(base_dir=BASE_DIR, fold_class=FOLD_CLASS):
+    """Process every page in _site/; returns {page: (inlined bytes, full bytes)}"""
+    directory = site_dir(base_dir)
+    baseurl = base_url(base_dir)
+    script = Path(base_dir) / SCRIPT
+    script_classes = js_classes(script.read_text(encoding='utf-8')) if script.exists() else set()
+    stylesheets = {}
+    results = {}
+    for path in html_pages(directory):
+        result = process_page(path, directory, baseurl, script_classes, fold_class, stylesheets)
+        if result:
+            results[path.relative_to(directory).as_posix()] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline above-the-fold CSS into the built pages")
+    parser.add_argument('--fold', default=FOLD_CLASS, metavar='CLASS',
+                        help=f"class of the last element above the fold (default: {FOLD_CLASS})")
+    args = parser.parse_args()
+
+    if not site_dir().is_dir():
+        print("⚠️  No _site/ yet, run jekyll build first")
+        return
+    print("🎨 Inlining critical CSS...")
+    results = inline_critical_css(fold_class=args.fold)
+    for page, (inlined, full) in results.items():
+        print(f"   ✓ {page}: {inlined:,} bytes inlined, {full:,} bytes deferred")
+    print(f"✅ {len(results)} page(s) updated")
+
+
+if __name__ == '__main__':
+    main()
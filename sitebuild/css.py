@@ -0,0 +1,287 @@
+"""
+Minimal CSS parsing and selector usage checks for the post-build stages
+
+Not a full CSS engine: just enough to split a stylesheet into rules,
+write it back out (optionally minified), and decide whether a selector
+can match a set of pages by checking that every tag, class, id and
+attribute it names occurs in them. Combinators and pseudo-classes are
+ignored, so a selector is only ever judged unused when it certainly is.
+"""
+
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# A style rule, e.g. '.hero h1' { font-size: 3rem }
+Rule = namedtuple('Rule', 'selector body')
+# An at-rule: children for @media/@supports, body for @font-face/@keyframes,
+# neither for statements like @import
+AtRule = namedtuple('AtRule', 'prelude body children')
+
+# At-rules whose block holds style rules
+NESTING_AT_RULES = ('@media', '@supports', '@document', '@layer', '@container')
+
+STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+STRING_RE = re.compile(STRING, re.S)
+COMMENT_OR_STRING = re.compile(rf'({STRING})|/\*.*?\*/', re.S)
+STRING_SPLIT = re.compile(rf'({STRING})', re.S)
+
+# Elements that never have a closing tag
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+def strip_comments(text):
+    return COMMENT_OR_STRING.sub(lambda m: m.group(1) or '', text)
+
+
+def _scan(text, pos, stops):
+    """Return the index of the next stop character outside strings and parentheses"""
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in '"\'':
+            match = STRING_RE.match(text, pos)
+            pos = match.end() if match else len(text)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        elif depth == 0 and char in stops:
+            return pos
+        pos += 1
+    return pos
+
+
+def _block_end(text, pos):
+    """Index of the '}' closing the block opened at text[pos]"""
+    depth = 0
+    while pos < len(text):
+        pos = _scan(text, pos, '{}')
+        if pos >= len(text):
+            break
+        depth += 1 if text[pos] == '{' else -1
+        if depth == 0:
+            return pos
+        pos += 1
+    return len(text)
+
+
+def _parse(text, pos):
+    nodes = []
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text):
+            return nodes, pos
+        if text[pos] == '}':
+            return nodes, pos + 1
+        start = pos
+        pos = _scan(text, pos, '{;}')
+        prelude = ' '.join(text[start:pos].split())
+        if pos >= len(text) or text[pos] != '{':
+            if prelude:
+                nodes.append(AtRule(prelude, None, None))
+            if pos < len(text) and text[pos] == ';':
+                pos += 1
+            continue
+        if prelude.lower().startswith(NESTING_AT_RULES):
+            children, pos = _parse(text, pos + 1)
+            nodes.append(AtRule(prelude, None, children))
+            continue
+        end = _block_end(text, pos)
+        body = text[pos + 1:end].strip()
+        nodes.append(AtRule(prelude, body, None) if prelude.startswith('@') else Rule(prelude, body))
+        pos = end + 1
+
+
+def parse_stylesheet(text):
+    """Parse CSS text into a list of Rule/AtRule nodes"""
+    return _parse(strip_comments(text), 0)[0]
+
+
+def _outside_strings(text, transform):
+    parts = STRING_SPLIT.split(text)
+    return ''.join(part if index % 2 else transform(part) for index, part in enumerate(parts))
+
+
+def minify_selector(selector):
+    return _outside_strings(selector, lambda part: re.sub(r'\s*([,>+~])\s*', r'\1', ' '.join(part.split())))
+
+
+def minify_body(body):
+    body = _outside_strings(body, lambda part: re.sub(r'\s*([:;,{}])\s*', r'\1', ' '.join(part.split())))
+    return body.rstrip(';')
+
+
+def _block(prelude, body, indent):
+    lines = '\n'.join(f'{indent}    {line.strip()}' for line in body.splitlines() if line.strip())
+    return f'{indent}{prelude} {{\n{lines}\n{indent}}}'
+
+
+def serialize(nodes, minify=False, indent=''):
+    """Write nodes back out as CSS"""
+    out = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            if minify:
+                out.append(f'{minify_selector(node.selector)}{{{minify_body(node.body)}}}')
+            else:
+                out.append(_block(node.selector, node.body, indent))
+        elif node.children is not None:
+            inner = serialize(node.children, minify, indent + '    ')
+            out.append(f'{node.prelude}{{{inner}}}' if minify
+                       else f'{indent}{node.prelude} {{\n{inner}\n{indent}}}')
+        elif node.body is not None:
+            if minify:
+                out.append(f'{node.prelude}{{{minify_body(node.body)}}}')
+            else:
+                out.append(_block(node.prelude, node.body, indent))
+        else:
+            out.append(f'{indent}{node.prelude};')
+    return ''.join(out) if minify else '\n\n'.join(out)
+
+
+def new_usage():
+    return {'tags': set(), 'classes': set(), 'ids': set(), 'attributes': set()}
+
+
+class UsageCollector(HTMLParser):
+    """Collects the tags, classes, ids and attribute names in HTML.
+
+    With stop_class, collection ends after the first element carrying
+    that class is closed (e.g. 'hero' for everything above the fold);
+    found tells whether that element was seen.
+    """
+
+    def __init__(self, usage=None, stop_class=None):
+        super().__init__(convert_charrefs=True)
+        self.usage = usage if usage is not None else new_usage()
+        self.stop_class = stop_class
+        self.stack = []
+        self.stop_depth = None
+        self.found = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self.usage['tags'].add(tag)
+        classes = []
+        for name, value in attrs:
+            self.usage['attributes'].add(name)
+            if name == 'class' and value:
+                classes = value.split()
+                self.usage['classes'].update(classes)
+            elif name == 'id' and value:
+                self.usage['ids'].add(value)
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        if self.stop_class and self.stop_depth is None and self.stop_class in classes:
+            self.stop_depth = len(self.stack)
+            self.found = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and not self.done:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.done or tag not in self.stack:
+            return
+        while self.stack:
+            closed = self.stack.pop()
+            if self.stop_depth is not None and len(self.stack) < self.stop_depth:
+                self.done = True
+                return
+            if closed == tag:
+                return
+
+
+def html_usage(html, usage=None, stop_class=None):
+    """Return (usage, found) for a page; see UsageCollector"""
+    collector = UsageCollector(usage, stop_class)
+    collector.feed(html)
+    collector.close()
+    return collector.usage, collector.found
+
+
+# Class names and elements scripts create at runtime
+JS_CLASS_CALL = re.compile(r'classList\.(?:add|remove|toggle|replace)\(([^)]*)\)')
+JS_CLASS_NAME = re.compile(r'className\s*=\s*[\'"`]([^\'"`]*)[\'"`]')
+JS_STRING = re.compile(r'[\'"`]([\w -]+)[\'"`]')
+JS_TAG = re.compile(r'<([a-z][a-z0-9]*)\b')
+
+
+def js_classes(source):
+    """Return the class names a script adds via classList or className"""
+    classes = set()
+    for match in JS_CLASS_CALL.finditer(source):
+        for string in JS_STRING.findall(match.group(1)):
+            classes.update(string.split())
+    for match in JS_CLASS_NAME.finditer(source):
+        classes.update(match.group(1).split())
+    return classes
+
+
+def js_tags(source):
+    """Return the element names a script writes as HTML (e.g. via innerHTML)"""
+    return set(JS_TAG.findall(source))
+
+
+PSEUDO = re.compile(r'::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+TAG = re.compile(r'[A-Za-z][\w-]*')
+CLASS = re.compile(r'\.(-?[_A-Za-z][\w-]*)')
+ID = re.compile(r'#(-?[_A-Za-z][\w-]*)')
+ATTRIBUTE = re.compile(r'\[\s*([\w-]+)')
+
+
+def selector_used(selector, usage):
+    """Check whether every tag, class, id and attribute in a selector occurs in usage"""
+    selector = PSEUDO.sub('', STRING_RE.sub('""', selector))
+    for compound in re.split(r'\s*[>+~]\s*|\s+', selector.strip()):
+        tag = TAG.match(compound)
+        if tag and tag.group(0).lower() not in usage['tags']:
+            return False
+        if any(name not in usage['classes'] for name in CLASS.findall(compound)):
+            return False
+        if any(name not in usage['ids'] for name in ID.findall(compound)):
+            return False
+        if any(name.lower() not in usage['attributes'] for name in ATTRIBUTE.findall(compound)):
+            return False
+    return True
+
+
+def split_selectors(selector):
+    """Split a selector list on its top-level commas"""
+    parts = []
+    pos = 0
+    while pos <= len(selector):
+        end = _scan(selector, pos, ',')
+        parts.append(selector[pos:end].strip())
+        pos = end + 1
+    return [part for part in parts if part]
+
+
+def filter_rules(nodes, keep_selector):
+    """Return nodes without the selectors keep_selector rejects.
+
+    Rules lose their unused selectors and disappear once they have none;
+    nesting at-rules disappear once empty. Other at-rules (@font-face,
+    @keyframes, @import, ...) are always kept.
+    """
+    kept = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selectors = [s for s in split_selectors(node.selector) if keep_selector(s)]
+            if selectors:
+                kept.append(Rule(', '.join(selectors), node.body))
+        elif node.children is not None:
+            children = filter_rules(node.children, keep_selector)
+            if children:
+                kept.append(AtRule(node.prelude, None, children))
+        else:
+            kept.append(node)
+    return kept
@@ -0,0 +1,143 @@
+"""
+CMS-managed data files and their mirrors between content/ and _data/
+
+The file collections in admin/config.yml (hero, settings, signup form,
+service areas, ...) each name one JSON file. Every one of them has a
+copy under content/, the source of truth for the helper scripts, and
+one under _data/, where Jekyll reads it. This module derives those
+pairs from the CMS config, so a new file collection needs no code
+changes, and materialises the _data/ side as a link or copy.
+"""
+
+import os
+from pathlib import Path
+
+from . import BASE_DIR
+from .digests import file_digest
+from .frontmatter import yaml
+
+# Ways to materialise a mirror, in the order 'auto' tries them
+LINK_MODES = ('symlink', 'hardlink', 'reflink', 'copy')
+
+# Linux FICLONE ioctl: share extents with the source (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def load_cms_config(base_dir=BASE_DIR):
+    """Load admin/config.yml"""
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read admin/config.yml (pip install pyyaml)")
+    with open(Path(base_dir) / 'admin' / 'config.yml', 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)) or {}
+
+
+def cms_files(cms_config):
+    """Return the 'file:' path of every file collection entry"""
+    files = []
+    for collection in cms_config.get('collections') or []:
+        for entry in collection.get('files') or []:
+            if entry.get('file'):
+                files.append(entry['file'])
+    return files
+
+
+def mirror_pair(cms_file, exists):
+    """Return the (content/ source, _data/ mirror) paths for a CMS file.
+
+    _data/<name> is mirrored from content/<name>, or from
+    content/_data/<name> if that's where it lives; a CMS file under
+    content/<name> is mirrored to _data/<name>. exists is called with a
+    relative path to check which source is present.
+    """
+    path = Path(cms_file)
+    if path.parts[0] == '_data':
+        name = Path(*path.parts[1:])
+        source = Path('content') / name
+        nested = Path('content') / '_data' / name
+        if not exists(source) and exists(nested):
+            source = nested
+        return source, path
+    if path.parts[0] == 'content':
+        return path, Path('_data') / Path(*path.parts[1:])
+    return None
+
+
+def data_file_pairs(base_dir=BASE_DIR, exists=None, cms_config=None):
+    """Return the (source, mirror) relative paths for every CMS data file"""
+    if exists is None:
+        exists = lambda path: (Path(base_dir) / path).exists()
+    pairs = []
+    if cms_config is None:
+        cms_config = load_cms_config(base_dir)
+    for cms_file in cms_files(cms_config):
+        pair = mirror_pair(cms_file, exists)
+        if pair and pair not in pairs:
+            pairs.append(pair)
+    return pairs
+
+
+def is_in_sync(src, dest):
+    """Check whether dest is src itself, or a file with identical content"""
+    try:
+        if os.path.samefile(src, dest):
+            return True
+        if os.path.getsize(src) != os.path.getsize(dest):
+            return False
+    except OSError:
+        return False
+    return file_digest(src) == file_digest(dest)
+
+
+def _symlink(src, tmp):
+    os.symlink(os.path.relpath(src, tmp.parent), tmp)
+
+
+def _hardlink(src, tmp):
+    os.link(src, tmp)
+
+
+def _reflink(src, tmp):
+    import fcntl
+    with open(src, 'rb') as s, open(tmp, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def _copy(src, tmp):
+    with open(src, 'rb') as s, open(tmp, 'wb') as d:
+        for chunk in iter(lambda: s.read(65536), b''):
+            d.write(chunk)
+
+
+MAKERS = {'symlink': _symlink, 'hardlink': _hardlink, 'reflink': _reflink, 'copy': _copy}
+
+
+def materialise(src, dest, mode='auto'):
+    """Make dest mirror src and verify it by hash.
+
+    mode is one of LINK_MODES, or 'auto' to try them in order. A plain
+    copy is the fallback whenever the requested kind of link can't be
+    made (e.g. no symlink support, or src and dest on different
+    filesystems). dest is swapped in atomically. Returns the method
+    used, or 'unchanged' if dest already matched.
+    """
+    src, dest = Path(src), Path(dest)
+    if is_in_sync(src, dest):
+        return 'unchanged'
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+    modes = LINK_MODES if mode == 'auto' else (mode, 'copy')
+    for method in modes:
+        try:
+            MAKERS[method](src, tmp)
+            os.replace(tmp, dest)
+            break
+        except (OSError, ImportError):
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            if method == 'copy':
+                raise
+
+    if not is_in_sync(src, dest):
+        raise OSError(f"{dest} doesn't match {src} after {method}")
+    return method
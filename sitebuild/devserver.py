@@ -0,0 +1,359 @@
+"""
+Development server for the built site, with live reload
+
+Serves _site/ with asyncio, from an in-memory cache of the built files
+that is cleared whenever anything under _site/ changes (inotify where
+available, via sitebuild.sync's watchers). Every response has a strong
+ETag, so repeat requests get a 304; files precompressed by
+sitebuild.precompress are sent as-is to clients that accept br/gzip.
+
+Pages get a small script that listens on /__livereload (server-sent
+events) and reloads once a rebuild has settled. With --no-reload pages
+go out unmodified, precompressed variants included, which makes this a
+local staging mirror of the production build. One event loop serves
+every connection, so hundreds of concurrent clients are fine.
+
+Something else rebuilds _site/: serve.sh runs `jekyll build --watch`
+alongside this.
+
+Usage: python3 -m sitebuild.devserver [--port 4000] [--host 127.0.0.1] [--no-reload] [--verbose]
+"""
+
+import os
+import re
+import time
+import asyncio
+import hashlib
+import argparse
+import mimetypes
+import threading
+from collections import namedtuple
+from email.utils import formatdate
+from urllib.parse import unquote, urlsplit
+
+from . import BASE_DIR
+from .site import site_dir, base_url
+from .sync import make_watcher
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+RELOAD_PATH = '/__livereload'
+RELOAD_SCRIPT = (f'<script>new EventSource("{RELOAD_PATH}").addEventListener("reload", '
+                 'function () { location.reload(); });</script>').encode('ascii')
+
+# Variants written by sitebuild.precompress, best first: (Content-Encoding, suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Bigger files are read from disk on every request rather than cached
+MAX_CACHED = 8 * 1024 * 1024
+MAX_HEADER = 64 * 1024
+KEEP_ALIVE = 30
+HEARTBEAT = 15
+
+STATUS = {200: 'OK', 301: 'Moved Permanently', 304: 'Not Modified', 400: 'Bad Request',
+          404: 'Not Found', 405: 'Method Not Allowed'}
+
+for _type, _extension in (('application/manifest+json', '.webmanifest'), ('image/avif', '.avif'),
+                          ('image/webp', '.webp'), ('text/javascript', '.js'), ('text/javascript', '.mjs')):
+    mimetypes.add_type(_type, _extension)
+
+# One encoding of a file: body, its ETag, and its Content-Encoding (None for identity)
+Representation = namedtuple('Representation', 'body etag encoding')
+# A lookup result: kind is 'file', 'redirect' or 'missing'
+Resource = namedtuple('Resource', 'kind content_type representations location')
+
+
+def representation(body, encoding=None):
+    return Representation(body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"', encoding)
+
+
+def content_type(path):
+    guessed, _ = mimetypes.guess_type(path)
+    guessed = guessed or 'application/octet-stream'
+    if guessed.startswith('text/') or guessed in ('application/json', 'application/xml', 'image/svg+xml'):
+        guessed += '; charset=utf-8'
+    return guessed
+
+
+def inject_reload(html):
+    """Add the live reload script before </body>"""
+    index = html.lower().rfind(b'</body>')
+    if index < 0:
+        return html + RELOAD_SCRIPT
+    return html[:index] + RELOAD_SCRIPT + html[index:]
+
+
+def accepted_encodings(header):
+    """The content codings an Accept-Encoding header allows"""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        match = re.search(r'q\s*=\s*([\d.]+)', params)
+        try:
+            q = float(match.group(1)) if match else 1.0
+        except ValueError:
+            q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, as RFC 9110 specifies for it)"""
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def raise_file_limit():
+    """Allow as many open connections as the hard limit does"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+        except (ValueError, OSError):
+            pass
+
+
+class DevServer:
+    def __init__(self, base_dir=BASE_DIR, reload=True, verbose=False, debounce=0.3):
+        self.root = site_dir(base_dir)
+        self.baseurl = base_url(base_dir)
+        self.reload = reload
+        self.verbose = verbose
+        self.debounce = debounce
+        self.cache = {}
+        self.listeners = set()
+        self.generation = 0
+
+    # --- Files ---------------------------------------------------------
+
+    def lookup(self, path):
+        """The Resource for a URL path, from the cache when possible"""
+        cached = self.cache.get(path)
+        if cached is not None:
+            return cached
+        found = self.resolve(path)
+        if found.kind != 'file' or sum(len(r.body) for r in found.representations.values()) <= MAX_CACHED:
+            self.cache[path] = found
+        return found
+
+    def resolve(self, path):
+        if self.baseurl:
+            if path == self.baseurl:
+                return Resource('redirect', None, None, path + '/')
+            if not path.startswith(self.baseurl + '/'):
+                return Resource('missing', None, None, None)
+            path = path[len(self.baseurl):]
+        parts = [part for part in unquote(path).split('/') if part not in ('', '.')]
+        if '..' in parts or any('\0' in part or part.startswith('.') for part in parts):
+            return Resource('missing', None, None, None)
+        target = self.root.joinpath(*parts)
+        if target.is_dir():
+            if not path.endswith('/'):
+                return Resource('redirect', None, None, self.baseurl + path + '/')
+            target = target / 'index.html'
+        elif not target.is_file() and target.with_name(target.name + '.html').is_file():
+            # Jekyll's extensionless permalinks
+            target = target.with_name(target.name + '.html')
+        if not target.is_file():
+            return Resource('missing', None, None, None)
+        return self.load(target)
+
+    def load(self, target):
+        body = target.read_bytes()
+        kind = content_type(target.name)
+        if self.reload and kind.startswith('text/html'):
+            # The precompressed variants don't have the script, so pages go out uncompressed
+            return Resource('file', kind, {None: representation(inject_reload(body))}, None)
+        representations = {None: representation(body)}
+        for encoding, suffix in ENCODINGS:
+            variant = target.with_name(target.name + suffix)
+            if variant.is_file():
+                representations[encoding] = representation(variant.read_bytes(), encoding)
+        return Resource('file', kind, representations, None)
+
+    def invalidate(self):
+        """_site/ changed: drop the cache and tell every page to reload"""
+        self.cache.clear()
+        self.generation += 1
+        for queue in self.listeners:
+            queue.put_nowait(self.generation)
+        if self.listeners:
+            print(f"🔄 _site/ changed, reloading {len(self.listeners)} page(s)")
+
+    def watch(self, loop):
+        """Watcher thread: invalidate once a burst of changes to _site/ settles"""
+        watcher, inode = None, None
+        while True:
+            try:
+                current = os.stat(self.root).st_ino
+            except OSError:
+                current = None
+            if current != inode:
+                # _site/ appeared or was replaced (e.g. by jekyll clean): watch the new one
+                if watcher is not None:
+                    watcher.close()
+                watcher = make_watcher([], [self.root]) if current is not None else None
+                inode = current
+                loop.call_soon_threadsafe(self.invalidate)
+            if watcher is None:
+                time.sleep(1)
+                continue
+            if watcher.wait(1.0):
+                while watcher.wait(self.debounce):
+                    pass
+                loop.call_soon_threadsafe(self.invalidate)
+
+    # --- HTTP ----------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        """One connection: requests until the client or a timeout closes it"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ConnectionError):
+                    return
+                request_line, *lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines:
+                    name, colon, value = line.partition(':')
+                    if colon:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(' ')
+                except ValueError:
+                    await self.send(writer, 400, {}, b'Bad request\n', keep_alive=False)
+                    return
+                # Nothing here takes a request body; refuse rather than misread the next request
+                if headers.get('content-length', '0') != '0' or 'transfer-encoding' in headers:
+                    await self.send(writer, 400, {}, b'Request bodies are not supported\n', keep_alive=False)
+                    return
+                connection = headers.get('connection', '').lower()
+                keep_alive = ('close' not in connection if version == 'HTTP/1.1'
+                              else 'keep-alive' in connection)
+                path = urlsplit(target).path or '/'
+                if self.verbose:
+                    print(f"   {method} {target}")
+                if self.reload and path == RELOAD_PATH and method == 'GET':
+                    await self.stream_events(writer)
+                    return
+                await self.respond(writer, method, path, headers, keep_alive)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond(self, writer, method, path, headers, keep_alive):
+        if method not in ('GET', 'HEAD'):
+            await self.send(writer, 405, {'Allow': 'GET, HEAD'}, b'Method not allowed\n', keep_alive)
+            return
+        found = self.lookup(path)
+        if found.kind == 'redirect':
+            await self.send(writer, 301, {'Location': found.location}, b'', keep_alive)
+            return
+        if found.kind == 'missing':
+            page = self.lookup('/404.html')
+            if page.kind == 'file':
+                await self.send(writer, 404, {'Content-Type': page.content_type},
+                                page.representations[None].body, keep_alive, head=method == 'HEAD')
+            else:
+                await self.send(writer, 404, {'Content-Type': 'text/plain; charset=utf-8'},
+                                b'Not found\n', keep_alive, head=method == 'HEAD')
+            return
+
+        chosen = found.representations[None]
+        if len(found.representations) > 1:
+            accepted = accepted_encodings(headers.get('accept-encoding', ''))
+            for encoding, _ in ENCODINGS:
+                if encoding in found.representations and (encoding in accepted or '*' in accepted):
+                    chosen = found.representations[encoding]
+                    break
+        response_headers = {'Content-Type': found.content_type, 'ETag': chosen.etag, 'Cache-Control': 'no-cache'}
+        if len(found.representations) > 1:
+            response_headers['Vary'] = 'Accept-Encoding'
+        if chosen.encoding:
+            response_headers['Content-Encoding'] = chosen.encoding
+        if etag_matches(headers.get('if-none-match', ''), chosen.etag):
+            await self.send(writer, 304, response_headers, b'', keep_alive, head=True)
+            return
+        await self.send(writer, 200, response_headers, chosen.body, keep_alive, head=method == 'HEAD')
+
+    async def send(self, writer, status, headers, body, keep_alive, head=False):
+        lines = [f'HTTP/1.1 {status} {STATUS[status]}', f'Date: {formatdate(usegmt=True)}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        if status != 304:
+            lines.append(f'Content-Length: {len(body)}')
+        lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if body and not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def stream_events(self, writer):
+        """Hold a server-sent events stream open; a `reload` event per rebuild"""
+        queue = asyncio.Queue()
+        self.listeners.add(queue)
+        try:
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+                         b'Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\nretry: 1000\n\n')
+            await writer.drain()
+            while True:
+                try:
+                    generation = await asyncio.wait_for(queue.get(), HEARTBEAT)
+                    writer.write(f'event: reload\ndata: {generation}\n\n'.encode('ascii'))
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing out, and finds clients that went away
+                    writer.write(b': ping\n\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.listeners.discard(queue)
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        threading.Thread(target=self.watch, args=(loop,), daemon=True).start()
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve _site/ with live reload")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', '-p', type=int, default=4000, help="port to listen on (default: 4000)")
+    parser.add_argument('--no-reload', dest='reload', action='store_false',
+                        help="serve pages unmodified, without live reload (staging mirror)")
+    parser.add_argument('--debounce', type=float, default=0.3, metavar='SECONDS',
+                        help="quiet period to wait for after a change before reloading (default: 0.3)")
+    parser.add_argument('--verbose', '-v', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    server = DevServer(reload=args.reload, verbose=args.verbose, debounce=args.debounce)
+    if not server.root.is_dir():
+        print("⚠️  No _site/ yet, serving it once it's built")
+    print(f"🚀 Serving _site/ at http://{args.host}:{args.port}{server.baseurl}/"
+          + (" with live reload" if args.reload else ""))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped serving")
+
+
+if __name__ == '__main__':
+    main()
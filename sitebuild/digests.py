@@ -0,0 +1,86 @@
+"""
+Content digests and a persistent digest cache for incremental builds
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from .files import atomic_write
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file on disk"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DigestCache:
+    """JSON-backed map of key -> file digest plus caller data.
+
+    Each entry remembers the size and mtime the file had when it was
+    hashed, so an untouched file is recognised from a stat() call alone
+    and only files that were actually modified get re-read.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        """Return the entry stored under key, or None"""
+        return self.entries.get(key)
+
+    def digest(self, key, path):
+        """Return the digest of path, reusing the cached one if it's untouched"""
+        st = os.stat(path)
+        entry = self.entries.get(key)
+        if entry and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+            return entry['digest']
+        return file_digest(path)
+
+    def is_current(self, key, path):
+        """Check whether path still has the digest recorded under key"""
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        try:
+            return self.digest(key, path) == entry['digest']
+        except OSError:
+            return False
+
+    def update(self, key, path, digest=None, **extra):
+        """Record the current digest and stat of path under key"""
+        st = os.stat(path)
+        self.entries[key] = dict(extra, digest=digest or file_digest(path),
+                                 size=st.st_size, mtime_ns=st.st_mtime_ns)
+        self.dirty = True
+
+    def set(self, key, **values):
+        """Store an entry that isn't tied to a file on disk"""
+        self.entries[key] = values
+        self.dirty = True
+
+    def remove(self, key):
+        """Forget key"""
+        if self.entries.pop(key, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """Write the cache back to disk if anything changed"""
+        if not self.dirty:
+            return
+        atomic_write(self.path, json.dumps(self.entries, indent=2, sort_keys=True).encode('utf-8'))
+        self.dirty = False
@@ -0,0 +1,54 @@
+"""
+Filesystem helpers
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_temp(path, data, mode=0o644, sync=False):
+    """Write data to a temporary file beside path and return its name.
+
+    Renaming it over path is then atomic. With sync the data is flushed
+    to disk first, so the rename can't expose an empty file after a crash.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def fsync_directory(path):
+    """Flush a directory entry so renames inside it are durable"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, mode=0o644):
+    """Replace path with data (bytes) without ever exposing a partial file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = write_temp(path, data, mode)
+    try:
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
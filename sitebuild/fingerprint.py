@@ -0,0 +1,107 @@
+"""
+Give the built CSS and JS content-hashed file names
+
+netlify.toml serves /assets/* as immutable for a year, which is only
+safe if a file's name changes whenever its content does. This renames
+every CSS/JS file under _site/assets/ to <name>.<hash><ext> (e.g.
+style.3f2a1b9c0d.css), rewrites every quoted reference to it in the
+built HTML (link/script tags, and strings like the CMS preview style
+in admin/index.html), and writes the mapping to _site/asset-manifest.json:
+
+    {"/assets/css/style.css": "/assets/css/style.3f2a1b9c0d.css", ...}
+
+The templates keep the plain names. This runs last among the _site/
+rewrites, after purge and critical, so the hash covers the final bytes;
+Jekyll clears the old hashed files on its next build.
+
+Usage: python3 -m sitebuild.fingerprint
+"""
+
+import os
+import re
+import json
+import argparse
+from urllib.parse import urlsplit
+
+from . import BASE_DIR
+from .digests import file_digest
+from .files import atomic_write
+from .site import site_dir, base_url, html_pages
+
+ASSETS_DIR = 'assets'
+EXTENSIONS = ('.css', '.js')
+MANIFEST = 'asset-manifest.json'
+HASH_LENGTH = 10
+
+HASHED_NAME = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}$')
+# A quoted root-relative URL, in an attribute or a script
+QUOTED_URL = re.compile(r'(["\'])(/[^"\'\s<>]*)\1')
+
+
+def fingerprint_assets(directory):
+    """Rename the assets; returns {original URL path: hashed URL path}"""
+    manifest = {}
+    assets = directory / ASSETS_DIR
+    if not assets.is_dir():
+        return manifest
+    for path in sorted(assets.rglob('*')):
+        if not path.is_file() or path.suffix not in EXTENSIONS or HASHED_NAME.search(path.stem):
+            continue
+        digest = file_digest(path)[:HASH_LENGTH]
+        hashed = path.with_name(f'{path.stem}.{digest}{path.suffix}')
+        os.replace(path, hashed)
+        manifest['/' + path.relative_to(directory).as_posix()] = '/' + hashed.relative_to(directory).as_posix()
+    return manifest
+
+
+def rewrite_references(html, manifest, baseurl=''):
+    """Point every quoted reference to an asset at its hashed name"""
+    def replace(match):
+        url = match.group(2)
+        parts = urlsplit(url)
+        path = parts.path
+        prefix = ''
+        if baseurl and path.startswith(baseurl + '/'):
+            prefix, path = baseurl, path[len(baseurl):]
+        if path not in manifest:
+            return match.group(0)
+        return match.group(1) + prefix + manifest[path] + url[len(parts.path):] + match.group(1)
+    return QUOTED_URL.sub(replace, html)
+
+
+def fingerprint_site(base_dir=BASE_DIR):
+    """Fingerprint _site/; returns (manifest, pages rewritten)"""
+    directory = site_dir(base_dir)
+    manifest = fingerprint_assets(directory)
+    rewritten = 0
+    if manifest:
+        baseurl = base_url(base_dir)
+        for page in html_pages(directory):
+            html = page.read_text(encoding='utf-8')
+            updated = rewrite_references(html, manifest, baseurl)
+            if updated != html:
+                atomic_write(page, updated.encode('utf-8'))
+                rewritten += 1
+    # Merge with earlier runs, so re-running on a fingerprinted _site/ keeps the mapping
+    manifest_path = directory / MANIFEST
+    if manifest_path.exists():
+        manifest = {**json.loads(manifest_path.read_text(encoding='utf-8')), **manifest}
+    atomic_write(manifest_path, (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+    return manifest, rewritten
+
+
+def main():
+    argparse.ArgumentParser(description="Give the built CSS and JS content-hashed names").parse_args()
+
+    if not site_dir().is_dir():
+        print("⚠️  No _site/ yet, run jekyll build first")
+        return
+    print("🔖 Fingerprinting assets...")
+    manifest, rewritten = fingerprint_site()
+    for original, hashed in manifest.items():
+        print(f"   ✓ {original} → {hashed}")
+    print(f"✅ {len(manifest)} asset(s), {rewritten} page(s) updated")
+
+
+if __name__ == '__main__':
+    main()
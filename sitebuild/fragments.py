@@ -0,0 +1,95 @@
+"""
+Fragment-level incremental rendering for sitebuild.liquid templates
+
+A template's top-level nodes are its fragments: in index.html that's the
+HTML between tags, each {% assign %}, and each section's {% for %} loop.
+FragmentGraph works out which data each fragment depends on, following
+assigns (the FAQ loop reads `faqs`, which is assigned from site.data.faq
+or site.faq), and FragmentCache keeps every fragment's last output, so
+after an edit only the fragments that depend on it are rendered again
+and spliced in between the cached ones.
+
+Data is named by its variable path: 'site.data.hero' for _data/hero.json,
+'site.faq' and 'site.data.faq' for the _faq collection, 'content' for
+the page a layout wraps. A path covers everything under it, so a
+fragment reading site.data depends on every data file.
+"""
+
+from .liquid import Context
+
+
+def paths_overlap(a, b):
+    """Check whether one variable path contains the other"""
+    return a == b or a.startswith(b + '.') or b.startswith(a + '.')
+
+
+class FragmentGraph:
+    """The data paths each top-level node of a template depends on"""
+
+    def __init__(self, template):
+        self.nodes = template.nodes
+        self.dependencies = []
+        self.assigns = []
+        # Name -> the data everything assigned to it so far came from
+        sources = {}
+        for node in self.nodes:
+            dependencies = set()
+            for ref in node.reads():
+                name = ref.split('.', 1)[0]
+                if name in sources:
+                    dependencies |= sources[name]
+                else:
+                    dependencies.add(ref)
+            writes = node.writes()
+            for name in writes:
+                sources[name] = sources.get(name, frozenset()) | dependencies
+            self.dependencies.append(frozenset(dependencies))
+            self.assigns.append(bool(writes))
+
+    def affected(self, changed):
+        """Indexes of the fragments whose output can change when the given paths do"""
+        return {index for index, dependencies in enumerate(self.dependencies)
+                if any(paths_overlap(path, key) for path in dependencies for key in changed)}
+
+    def consumers(self, key):
+        """The fragments that depend on one data path"""
+        return [node for node, dependencies in zip(self.nodes, self.dependencies)
+                if any(paths_overlap(path, key) for path in dependencies)]
+
+
+class FragmentCache:
+    """The last output of each fragment of one template"""
+
+    def __init__(self, template):
+        self.template = template
+        self.graph = FragmentGraph(template)
+        self.outputs = None
+
+    def render(self, variables, changed=None):
+        """Render, reusing the cached output of every fragment `changed` can't affect.
+
+        changed is a set of data paths, or None to render everything.
+        Fragments that assign variables always run, so later fragments
+        see current values; they're plain assigns in practice, and cheap.
+        Returns (output, number of fragments rendered).
+        """
+        nodes = self.graph.nodes
+        if self.outputs is None or changed is None:
+            affected = range(len(nodes))
+            self.outputs = [''] * len(nodes)
+        else:
+            affected = self.graph.affected(changed)
+        context = Context(variables)
+        rendered = 0
+        try:
+            for index, node in enumerate(nodes):
+                if index in affected or self.graph.assigns[index]:
+                    out = []
+                    node.render(context, out)
+                    self.outputs[index] = ''.join(out)
+                    rendered += 1
+        except Exception:
+            # Half-updated outputs can't be trusted next time
+            self.outputs = None
+            raise
+        return ''.join(self.outputs), rendered
@@ -0,0 +1,184 @@
+"""
+YAML front matter for Jekyll collection files
+"""
+
+import re
+import math
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Same delimiters Jekyll accepts: '---' to open, '---' or '...' to close
+FRONT_MATTER = re.compile(r'\A---[ \t]*\r?\n(.*?\n)?(?:---|\.\.\.)[ \t]*(?:\r?\n|\Z)', re.S)
+
+# Keys that can be written without quotes
+PLAIN_KEY = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+
+# Double-quoted scalar escapes, per the YAML 1.1 spec
+ESCAPES = {ord('\\'): '\\\\', ord('"'): '\\"', ord('\n'): '\\n', ord('\t'): '\\t',
+           ord('\r'): '\\r', 0: '\\0', 0x85: '\\N', 0x2028: '\\L', 0x2029: '\\P'}
+for _code in list(range(0x20)) + [0x7f]:
+    ESCAPES.setdefault(_code, f'\\x{_code:02x}')
+
+# Characters that rule out a literal block scalar
+NOT_BLOCK_SAFE = re.compile('[\x00-\x08\x0b-\x1f\x7f\x85\u2028\u2029]')
+
+
+def quote(text):
+    """Return text as a double-quoted YAML scalar"""
+    return '"' + text.translate(ESCAPES) + '"'
+
+
+def format_key(key):
+    """Return a mapping key, quoted only if it has to be"""
+    key = str(key)
+    if PLAIN_KEY.fullmatch(key) and key.lower() not in ('true', 'false', 'yes', 'no', 'on', 'off', 'null'):
+        return key
+    return quote(key)
+
+
+def format_scalar(value):
+    """Return a single-line YAML representation of a scalar value"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return '.nan'
+        if math.isinf(value):
+            return '.inf' if value > 0 else '-.inf'
+        text = repr(value)
+        # YAML 1.1 only reads exponent floats with a decimal point
+        if 'e' in text and '.' not in text:
+            text = text.replace('e', '.0e')
+        return text
+    if isinstance(value, dict):
+        return '{}'
+    if isinstance(value, (list, tuple)):
+        return '[]'
+    return quote(str(value))
+
+
+def is_block_safe(text):
+    """Check whether a multiline string can be written as a literal block"""
+    # The block's indentation is taken from its first non-empty line
+    first = text.strip('\n')[:1]
+    return (first and first not in ' \t' and '\n' in text
+            and not NOT_BLOCK_SAFE.search(text))
+
+
+def emit_block_scalar(text, stream, indent):
+    """Write a multiline string as a literal block scalar"""
+    body = text.rstrip('\n')
+    trailing = len(text) - len(body)
+    chomp = '-' if trailing == 0 else ('' if trailing == 1 else '+')
+    stream.write(f" |{chomp}\n")
+    pad = ' ' * indent
+    for line in body.split('\n'):
+        if line:
+            stream.write(pad)
+            stream.write(line)
+        stream.write('\n')
+    if trailing > 1:
+        stream.write('\n' * (trailing - 1))
+
+
+def emit_value(value, stream, indent):
+    """Write the value that follows a 'key:' or '-' already on the line"""
+    if isinstance(value, dict) and value:
+        stream.write('\n')
+        emit_mapping(value, stream, indent + 2)
+    elif isinstance(value, (list, tuple)) and value:
+        stream.write('\n')
+        emit_sequence(value, stream, indent + 2)
+    elif isinstance(value, str) and is_block_safe(value):
+        emit_block_scalar(value, stream, indent + 2)
+    else:
+        stream.write(' ')
+        stream.write(format_scalar(value))
+        stream.write('\n')
+
+
+def emit_mapping(mapping, stream, indent):
+    """Write a mapping, one key per line"""
+    pad = ' ' * indent
+    for key, value in mapping.items():
+        stream.write(pad)
+        stream.write(format_key(key))
+        stream.write(':')
+        emit_value(value, stream, indent)
+
+
+def emit_sequence(items, stream, indent):
+    """Write a sequence, one '- ' entry per item"""
+    pad = ' ' * indent
+    for item in items:
+        stream.write(pad)
+        if isinstance(item, dict) and item:
+            # The first key shares the '- ' line, the rest line up under it
+            stream.write('- ')
+            for i, (key, value) in enumerate(item.items()):
+                if i:
+                    stream.write(' ' * (indent + 2))
+                stream.write(format_key(key))
+                stream.write(':')
+                emit_value(value, stream, indent + 2)
+        elif isinstance(item, (list, tuple)) and item:
+            stream.write('-\n')
+            emit_sequence(item, stream, indent + 2)
+        else:
+            stream.write('-')
+            emit_value(item, stream, indent)
+
+
+def write_front_matter(data, stream):
+    """Write data as a YAML front matter block to a text stream.
+
+    Output goes straight to the stream, so the cost is linear in the size
+    of the data. Strings are double-quoted, or written as literal block
+    scalars if they span several lines; nested mappings and sequences are
+    written in block style.
+    """
+    stream.write('---\n')
+    emit_mapping(data, stream, 0)
+    stream.write('---\n')
+
+
+def split_front_matter(text):
+    """Split a document into (front matter text, body).
+
+    Returns (None, text) if the document has no front matter block.
+    """
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return None, text
+    return match.group(1) or '', text[match.end():]
+
+
+def parse_front_matter(text, name='<string>'):
+    """Parse a document into (front matter data, body)"""
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read front matter (pip install pyyaml)")
+    front_matter, body = split_front_matter(text)
+    if front_matter is None:
+        raise ValueError(f"{name}: no front matter")
+    try:
+        data = yaml.load(front_matter, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    except yaml.YAMLError as e:
+        raise ValueError(f"{name}: invalid front matter: {e}") from e
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{name}: front matter is not a mapping")
+    return data, body
+
+
+def read_front_matter(path):
+    """Read a collection file into (front matter data, body)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_front_matter(f.read(), str(path))
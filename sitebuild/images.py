@@ -0,0 +1,222 @@
+"""
+Resized AVIF/WebP/JPEG variants of the CMS uploads
+
+Every image in images/uploads/ is resized to each width in WIDTHS (never
+upscaled) and encoded as AVIF (when Pillow can write it), WebP and JPEG
+into images/generated/<source hash>/<width>.<ext>. Because the directory
+is named after the source's content hash, an upload is only processed
+once; unchanged uploads are skipped without even being opened.
+
+_data/images.json maps each upload's public path to its variants, and
+_includes/picture.html turns that into a <picture> with srcset/sizes:
+
+    {% include picture.html src=testimonial.photo alt=testimonial.name sizes="50px" %}
+
+Requires Pillow (pip install -r requirements.txt); without it the step
+is skipped and the include falls back to a plain <img>.
+
+Usage: python3 -m sitebuild.images [--jobs N] [--force]
+"""
+
+import io
+import os
+import json
+import shutil
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from . import BASE_DIR
+from .digests import DigestCache
+from .files import atomic_write
+from .metrics import Metrics, Progress
+from .site import base_url
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+else:
+    try:
+        import pillow_avif  # noqa: F401 -- registers AVIF support on older Pillow
+    except ImportError:
+        pass
+
+UPLOADS_DIR = 'images/uploads'
+OUTPUT_DIR = 'images/generated'
+DATA_FILE = '_data/images.json'
+CACHE_NAME = '.images-cache.json'
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Widths generated for every upload; 50 and 100 cover the testimonial avatars at 1x/2x
+WIDTHS = (50, 100, 160, 320, 640, 960, 1280, 1920)
+
+# Format: (extension, MIME type, Pillow format, save options), best first
+FORMATS = {
+    'avif': ('.avif', 'image/avif', 'AVIF', {'quality': 55}),
+    'webp': ('.webp', 'image/webp', 'WEBP', {'quality': 78, 'method': 6}),
+    'jpeg': ('.jpg', 'image/jpeg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+def available_formats():
+    """The FORMATS Pillow can write here"""
+    if Image is None:
+        return []
+    extensions = Image.registered_extensions()
+    return [name for name, (extension, _, pil_format, _) in FORMATS.items()
+            if extensions.get(extension) == pil_format and pil_format in Image.SAVE]
+
+
+def variant_widths(width):
+    """WIDTHS up to the source width, plus the source width itself if smaller than the largest"""
+    widths = [w for w in WIDTHS if w < width]
+    return widths + [width] if width < WIDTHS[-1] or not widths else widths
+
+
+def process_image(job):
+    """Write every variant of one upload; runs in a worker process.
+
+    Returns {'source', 'width', 'height', 'bytes', 'variants': {format:
+    [[width, file name], ...]}} or {'source', 'error'}.
+    """
+    source, out_dir, formats = job
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        width, height = image.size
+        resample = getattr(Image, 'Resampling', Image).LANCZOS
+
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        variants = {name: [] for name in formats}
+        nbytes = 0
+        for target in variant_widths(width):
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), resample)
+            for name in formats:
+                extension, _, pil_format, options = FORMATS[name]
+                output = resized
+                if pil_format == 'JPEG' and output.mode not in ('RGB', 'L'):
+                    output = output.convert('RGB')
+                buffer = io.BytesIO()
+                output.save(buffer, format=pil_format, **options)
+                file_name = f'{target}{extension}'
+                atomic_write(out_dir / file_name, buffer.getvalue())
+                nbytes += buffer.tell()
+                variants[name].append([target, file_name])
+        return {'source': str(source), 'width': width, 'height': height,
+                'bytes': nbytes, 'variants': variants}
+    except (OSError, ValueError) as e:
+        return {'source': str(source), 'error': str(e)}
+
+
+def image_data(entry, out_url):
+    """The _data/images.json entry for one processed upload"""
+    def srcset(name):
+        return ', '.join(f'{out_url}/{file_name} {width}w' for width, file_name in entry['variants'][name])
+
+    names = [name for name in FORMATS if entry['variants'].get(name)]
+    fallback = names[-1]
+    return {
+        'width': entry['width'],
+        'height': entry['height'],
+        'sources': [{'type': FORMATS[name][1], 'srcset': srcset(name)} for name in names[:-1]],
+        'srcset': srcset(fallback),
+        'src': f"{out_url}/{entry['variants'][fallback][-1][1]}",
+    }
+
+
+def is_complete(entry, out_dir, formats):
+    """Check that a cached entry has every format and all its files still exist"""
+    if not entry or 'variants' not in entry or sorted(entry['variants']) != sorted(formats):
+        return False
+    return all((out_dir / file_name).exists()
+               for files in entry['variants'].values() for _, file_name in files)
+
+
+def build_images(base_dir=BASE_DIR, jobs=None, force=False, metrics=None):
+    """Process new uploads and rewrite _data/images.json; returns a summary dict"""
+    base_dir = Path(base_dir)
+    metrics = metrics or Metrics()
+    formats = available_formats()
+    uploads = base_dir / UPLOADS_DIR
+    sources = sorted(path for path in uploads.rglob('*')
+                     if path.suffix.lower() in SOURCE_EXTENSIONS) if uploads.is_dir() else []
+    cache = DigestCache(base_dir / CACHE_NAME)
+    output_root = base_dir / OUTPUT_DIR
+    baseurl = base_url(base_dir)
+
+    entries, pending, errors = {}, [], []
+    for source in sources:
+        key = source.relative_to(base_dir).as_posix()
+        digest = cache.digest(key, source)
+        out_dir = output_root / digest[:16]
+        entry = cache.get(key)
+        if not force and entry and entry.get('digest') == digest and is_complete(entry, out_dir, formats):
+            entries[key] = entry
+        else:
+            pending.append((key, digest, (str(source), str(out_dir), formats)))
+
+    if pending:
+        progress = Progress("   processed")
+        with metrics.step('images'), ProcessPoolExecutor(max_workers=jobs) as pool:
+            for (key, digest, _), result in zip(pending, pool.map(process_image, [job for _, _, job in pending])):
+                if 'error' in result:
+                    errors.append((key, result['error']))
+                    progress.advance(files=0, errors=1)
+                    continue
+                cache.update(key, base_dir / key, digest=digest, width=result['width'],
+                             height=result['height'], variants=result['variants'])
+                entries[key] = cache.get(key)
+                metrics.record('images', nbytes=result['bytes'])
+                progress.advance(nbytes=result['bytes'])
+        progress.close()
+
+    # Drop uploads that were deleted, and the variant directories nothing uses any more
+    for key in [key for key in cache.entries if key not in entries]:
+        cache.remove(key)
+    cache.save()
+    used = {entry['digest'][:16] for entry in entries.values()}
+    removed = 0
+    if output_root.is_dir():
+        for directory in output_root.iterdir():
+            if directory.is_dir() and directory.name not in used:
+                shutil.rmtree(directory)
+                removed += 1
+
+    data = {}
+    for key, entry in sorted(entries.items()):
+        out_url = f"{baseurl}/{OUTPUT_DIR}/{entry['digest'][:16]}"
+        data[f'/{key}'] = image_data(entry, out_url)
+    atomic_write(base_dir / DATA_FILE, (json.dumps(data, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+    return {'sources': len(sources), 'processed': len(pending) - len(errors),
+            'removed': removed, 'errors': errors, 'formats': formats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate responsive variants of the CMS uploads")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="re-process every upload")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("⚠️  Pillow isn't installed (pip install -r requirements.txt), skipping responsive images")
+        return
+    print("🖼️  Generating responsive images...")
+    metrics = Metrics()
+    summary = build_images(jobs=max(1, args.jobs), force=args.force, metrics=metrics)
+    for key, error in summary['errors']:
+        print(f"❌ {key}: {error}")
+    print(f"✅ {summary['sources']} upload(s), {summary['processed']} processed, "
+          f"{summary['removed']} stale variant set(s) removed ({', '.join(summary['formats'])})")
+    metrics.print_report()
+
+
+if __name__ == '__main__':
+    main()
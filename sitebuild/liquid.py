@@ -0,0 +1,667 @@
+"""
+A small Liquid renderer for previews
+
+Supports the subset of Liquid (and Jekyll's filters) our templates use:
+
+    {{ expr | filter: arg }}    output
+    {% assign %}                {% if %} {% elsif %} {% else %} {% unless %}
+    {% for x in list %}         with ranges (1..n), limit/offset/reversed, forloop
+    {% include file k=v %}      from _includes/, params as include.k
+    {% comment %}
+
+Filters: default, sort, relative_url, absolute_url, slugify, jsonify,
+escape, size, join, upcase, downcase, strip, append, prepend. Anything
+else (tags, filters) is a LiquidError at parse time, so unsupported
+syntax fails loudly instead of rendering wrong.
+
+Templates compile once into a tree of nodes; render() walks it. As in
+Liquid, only nil and false are falsy, and assign writes to the
+top-level scope.
+"""
+
+import re
+import json
+import html
+from pathlib import Path
+from contextlib import contextmanager
+
+
+class LiquidError(Exception):
+    pass
+
+
+TOKEN = re.compile(r'{%(-?)\s*(.*?)\s*(-?)%}|{{(-?)\s*(.*?)\s*(-?)}}', re.S)
+QUOTED = r'"[^"]*"|\'[^\']*\''
+WORD_OPS = re.compile(rf'({QUOTED})|\s+(and|or)\s+', re.S)
+COMPARISON = re.compile(rf'^(.*?)\s*(==|!=|<>|>=|<=|>|<|\bcontains\b)\s*(.*)$', re.S)
+RANGE = re.compile(r'^\(\s*(.+?)\s*\.\.\s*(.+?)\s*\)$')
+NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+PATH_PART = re.compile(r'\.?([\w-]+\??)|\[([^\]]+)\]')
+INCLUDE_PARAM = re.compile(rf'([\w-]+)\s*=\s*({QUOTED}|[^\s]+)')
+FOR_TAG = re.compile(r'^([\w-]+)\s+in\s+(\(.*?\)|\S+)\s*(.*)$', re.S)
+
+
+class Empty:
+    """Liquid's `empty`: equal to '', [] and {}"""
+
+    def __eq__(self, other):
+        return isinstance(other, (str, list, dict, Empty)) and not other
+
+    def __hash__(self):
+        return 0
+
+
+EMPTY = Empty()
+LITERALS = {'true': True, 'false': False, 'nil': None, 'null': None, 'empty': EMPTY, 'blank': EMPTY}
+
+
+def split_outside_quotes(text, separator):
+    """Split on a separator character, ignoring any inside quotes"""
+    parts, current, quote = [], [], None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == separator:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def to_output(value):
+    """Render a value the way Liquid prints it"""
+    if value is None or value is EMPTY:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (list, tuple)):
+        return ''.join(to_output(item) for item in value)
+    return str(value)
+
+
+def is_truthy(value):
+    return value is not None and value is not False
+
+
+def lookup(value, key):
+    if isinstance(value, dict):
+        return value.get(key)
+    if isinstance(value, (list, tuple, str)):
+        if isinstance(key, int):
+            return value[key] if -len(value) <= key < len(value) else None
+        if key == 'size':
+            return len(value)
+        if key == 'first':
+            return value[0] if value else None
+        if key == 'last':
+            return value[-1] if value else None
+    return None
+
+
+def with_refs(function, refs=(), literal=None):
+    """Tag a compiled expression with the variable paths it reads (e.g. 'site.data.faq')"""
+    function.refs = frozenset(refs)
+    function.literal = literal
+    return function
+
+
+def literal_expression(value):
+    return with_refs(lambda context: value, literal=value)
+
+
+def compile_expression(text):
+    """Compile a literal, variable path or range into a function of the context"""
+    text = text.strip()
+    if not text:
+        raise LiquidError("empty expression")
+    if text[0] in '"\'' and text[-1] == text[0] and len(text) > 1:
+        return literal_expression(text[1:-1])
+    if NUMBER.match(text):
+        return literal_expression(float(text) if '.' in text else int(text))
+    if text in LITERALS:
+        return literal_expression(LITERALS[text])
+    match = RANGE.match(text)
+    if match:
+        start, end = compile_expression(match.group(1)), compile_expression(match.group(2))
+        return with_refs(lambda context: list(range(to_int(start(context)), to_int(end(context)) + 1)),
+                         start.refs | end.refs)
+
+    parts = []
+    pos = 0
+    while pos < len(text):
+        match = PATH_PART.match(text, pos)
+        if not match or (pos and match.group(1) and text[pos] != '.'):
+            raise LiquidError(f"can't parse expression: {text}")
+        if match.group(1):
+            parts.append(match.group(1))
+        else:
+            parts.append(compile_expression(match.group(2)))
+        pos = match.end()
+    head, rest = parts[0], parts[1:]
+    if not isinstance(head, str):
+        raise LiquidError(f"can't parse expression: {text}")
+
+    # The path as far as it's static: d["a-b"].c reads d.a-b.c, d[x].c reads d (and x)
+    path, refs, static = [head], set(), True
+    for part in rest:
+        if not isinstance(part, str):
+            refs |= part.refs
+            part = part.literal if isinstance(part.literal, (str, int)) else None
+        if static and part is not None:
+            path.append(str(part))
+        else:
+            static = False
+
+    def evaluate(context):
+        value = context.get(head)
+        for part in rest:
+            key = part if isinstance(part, str) else part(context)
+            value = lookup(value, key)
+            if value is None:
+                return None
+        return value
+    return with_refs(evaluate, refs | {'.'.join(path)})
+
+
+def to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def compile_condition(text):
+    """Compile `a == b and c or d` (evaluated right to left, as Liquid does)"""
+    pieces = []
+    pos = 0
+    for match in WORD_OPS.finditer(text):
+        if match.group(2):
+            pieces.append(text[pos:match.start()])
+            pieces.append(match.group(2))
+            pos = match.end()
+    pieces.append(text[pos:])
+    terms = [compile_comparison(piece) for piece in pieces[::2]]
+    operators = pieces[1::2]
+
+    def evaluate(context):
+        result = terms[-1](context)
+        for term, operator in zip(reversed(terms[:-1]), reversed(operators)):
+            if operator == 'and':
+                result = is_truthy(term(context)) and is_truthy(result)
+            else:
+                result = is_truthy(term(context)) or is_truthy(result)
+        return result
+    return with_refs(evaluate, frozenset().union(*(term.refs for term in terms)))
+
+
+def compile_comparison(text):
+    match = COMPARISON.match(text.strip())
+    if not match or match.group(1)[:1] in '"\'' and match.group(1).count(match.group(1)[0]) == 1:
+        return compile_expression(text)
+    left, operator, right = compile_expression(match.group(1)), match.group(2), compile_expression(match.group(3))
+
+    def evaluate(context):
+        a, b = left(context), right(context)
+        if operator == '==':
+            return a == b or (b is EMPTY and a == EMPTY)
+        if operator in ('!=', '<>'):
+            return not (a == b or (b is EMPTY and a == EMPTY))
+        if operator == 'contains':
+            return a is not None and b is not None and (str(b) in a if isinstance(a, str) else b in a)
+        try:
+            return {'<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[operator]
+        except TypeError:
+            return False
+    return with_refs(evaluate, left.refs | right.refs)
+
+
+# --- Filters -------------------------------------------------------------
+
+def filter_default(value, fallback=None, **options):
+    if value is None or value is False or value == EMPTY:
+        return fallback
+    return value
+
+
+def filter_sort(value, prop=None):
+    if not isinstance(value, (list, tuple)):
+        return value
+    if prop is None:
+        return sorted(value, key=sort_key)
+    # Jekyll puts items without the property first
+    return sorted(value, key=lambda item: (lookup(item, prop) is not None, sort_key(lookup(item, prop))))
+
+
+def sort_key(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, '')
+    return (1, 0, to_output(value))
+
+
+def filter_slugify(value, mode='default'):
+    text = to_output(value).lower()
+    text = re.sub(r'[^\w]+|_+', '-', text) if mode != 'raw' else re.sub(r'\s+', '-', text)
+    return text.strip('-')
+
+
+def filter_jsonify(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+FILTERS = {
+    'default': filter_default,
+    'sort': filter_sort,
+    'slugify': filter_slugify,
+    'jsonify': filter_jsonify,
+    'escape': lambda value: html.escape(to_output(value)),
+    'size': lambda value: len(value) if isinstance(value, (str, list, tuple, dict)) else 0,
+    'join': lambda value, glue=' ': glue.join(to_output(item) for item in value) if isinstance(value, (list, tuple)) else value,
+    'upcase': lambda value: to_output(value).upper(),
+    'downcase': lambda value: to_output(value).lower(),
+    'strip': lambda value: to_output(value).strip(),
+    'append': lambda value, suffix: to_output(value) + to_output(suffix),
+    'prepend': lambda value, prefix: to_output(prefix) + to_output(value),
+}
+
+# Filters that need the site configuration
+CONTEXT_FILTERS = {'relative_url', 'absolute_url'}
+
+
+def url_filter(name, value, context):
+    site = context.get('site') or {}
+    path = to_output(value)
+    if re.match(r'^[a-z][a-z0-9+.-]*:', path, re.I):
+        return path
+    url = (site.get('baseurl') or '').rstrip('/') + '/' + path.lstrip('/')
+    if name == 'absolute_url':
+        url = (site.get('url') or '').rstrip('/') + url
+    return url
+
+
+def compile_output(text):
+    """Compile `expr | filter: arg, arg | filter` into a function of the context"""
+    parts = split_outside_quotes(text, '|')
+    value = compile_expression(parts[0])
+    filters = []
+    for part in parts[1:]:
+        name, _, arguments = part.strip().partition(':')
+        name = name.strip()
+        if name not in FILTERS and name not in CONTEXT_FILTERS:
+            raise LiquidError(f"unsupported filter: {name}")
+        args, kwargs = [], {}
+        for argument in split_outside_quotes(arguments, ',') if arguments.strip() else []:
+            key, colon, rest = argument.partition(':')
+            if colon and re.fullmatch(r'\s*[\w-]+\s*', key) and rest.strip():
+                kwargs[key.strip()] = compile_expression(rest)
+            else:
+                args.append(compile_expression(argument))
+        filters.append((name, args, kwargs))
+
+    def evaluate(context):
+        result = value(context)
+        for name, args, kwargs in filters:
+            if name in CONTEXT_FILTERS:
+                result = url_filter(name, result, context)
+            else:
+                result = FILTERS[name](result, *[arg(context) for arg in args],
+                                       **{key: arg(context) for key, arg in kwargs.items()})
+        return result
+
+    refs = set(value.refs)
+    for name, args, kwargs in filters:
+        refs.update(*(arg.refs for arg in args + list(kwargs.values())))
+        if name in CONTEXT_FILTERS:
+            refs |= {'site.baseurl', 'site.url'}
+    return with_refs(evaluate, refs)
+
+
+# --- Nodes ---------------------------------------------------------------
+#
+# Besides render(), every node reports the variable paths it reads and
+# the names it assigns, which sitebuild.fragments uses to work out what
+# a change to the site's data can affect.
+
+def nodes_reads(nodes):
+    return frozenset().union(*(node.reads() for node in nodes))
+
+
+def nodes_writes(nodes):
+    return frozenset().union(*(node.writes() for node in nodes))
+
+
+def without(refs, *names):
+    """Drop the paths rooted at local names (loop variables, include)"""
+    return frozenset(ref for ref in refs if ref.split('.', 1)[0] not in names)
+
+
+class Node:
+    line = None
+
+    def reads(self):
+        return frozenset()
+
+    def writes(self):
+        return frozenset()
+
+
+class Text(Node):
+    def __init__(self, text):
+        self.text = text
+
+    def render(self, context, out):
+        out.append(self.text)
+
+
+class Output(Node):
+    def __init__(self, source):
+        self.source = source
+        self.evaluate = compile_output(source)
+
+    def render(self, context, out):
+        out.append(to_output(self.evaluate(context)))
+
+    def reads(self):
+        return self.evaluate.refs
+
+
+class Assign(Node):
+    def __init__(self, source):
+        name, equals, expression = source.partition('=')
+        if not equals or not name.strip():
+            raise LiquidError(f"bad assign: {source}")
+        self.source = source
+        self.name = name.strip()
+        self.evaluate = compile_output(expression)
+
+    def render(self, context, out):
+        context.assign(self.name, self.evaluate(context))
+
+    def reads(self):
+        return self.evaluate.refs
+
+    def writes(self):
+        return frozenset([self.name])
+
+
+class Conditional(Node):
+    """if/unless with elsif/else branches: [(condition or None, body)]"""
+
+    def __init__(self, source, negate=False):
+        self.source = source
+        self.branches = [(compile_condition(source), [])]
+        self.negate = negate
+
+    def add_branch(self, source):
+        self.branches.append((compile_condition(source) if source is not None else None, []))
+
+    def render(self, context, out):
+        for index, (condition, body) in enumerate(self.branches):
+            if condition is not None:
+                passed = is_truthy(condition(context))
+                if index == 0 and self.negate:
+                    passed = not passed
+                if not passed:
+                    continue
+            render_nodes(body, context, out)
+            return
+
+    def reads(self):
+        return frozenset().union(*(condition.refs | nodes_reads(body) if condition else nodes_reads(body)
+                                   for condition, body in self.branches))
+
+    def writes(self):
+        return frozenset().union(*(nodes_writes(body) for _, body in self.branches))
+
+
+class For(Node):
+    def __init__(self, source):
+        match = FOR_TAG.match(source)
+        if not match:
+            raise LiquidError(f"bad for: {source}")
+        self.source = source
+        self.name = match.group(1)
+        self.iterable = compile_expression(match.group(2))
+        options = match.group(3)
+        self.reversed = bool(re.search(r'\breversed\b', options))
+        limit = re.search(r'\blimit\s*:\s*(\S+)', options)
+        offset = re.search(r'\boffset\s*:\s*(\S+)', options)
+        self.limit = compile_expression(limit.group(1)) if limit else None
+        self.offset = compile_expression(offset.group(1)) if offset else None
+        self.body = []
+        self.else_body = None
+
+    def render(self, context, out):
+        items = self.iterable(context)
+        if isinstance(items, dict):
+            items = [[key, value] for key, value in items.items()]
+        elif not isinstance(items, (list, tuple)):
+            items = [] if items is None or items is EMPTY else [items]
+        if self.offset:
+            items = items[to_int(self.offset(context)):]
+        if self.limit:
+            items = items[:to_int(self.limit(context))]
+        if self.reversed:
+            items = items[::-1]
+        if not items:
+            if self.else_body:
+                render_nodes(self.else_body, context, out)
+            return
+        length = len(items)
+        with context.scope() as scope:
+            for index, item in enumerate(items):
+                scope[self.name] = item
+                scope['forloop'] = {'index': index + 1, 'index0': index, 'first': index == 0,
+                                    'last': index == length - 1, 'length': length,
+                                    'rindex': length - index, 'rindex0': length - index - 1}
+                render_nodes(self.body, context, out)
+
+    def reads(self):
+        refs = self.iterable.refs | without(nodes_reads(self.body), self.name, 'forloop')
+        for option in (self.limit, self.offset):
+            if option:
+                refs |= option.refs
+        return refs | nodes_reads(self.else_body or [])
+
+    def writes(self):
+        return nodes_writes(self.body) | nodes_writes(self.else_body or [])
+
+
+class Include(Node):
+    def __init__(self, source, loader):
+        name, _, params = source.partition(' ')
+        self.source = source
+        self.name = name.strip()
+        self.loader = loader
+        self.params = [(key, compile_expression(value)) for key, value in INCLUDE_PARAM.findall(params)]
+
+    def render(self, context, out):
+        template = self.loader(self.name)
+        params = {key: value(context) for key, value in self.params}
+        with context.scope() as scope:
+            scope['include'] = params
+            render_nodes(template.nodes, context, out)
+
+    def reads(self):
+        params = frozenset().union(*(value.refs for _, value in self.params))
+        return params | without(nodes_reads(self.loader(self.name).nodes), 'include')
+
+    def writes(self):
+        return nodes_writes(self.loader(self.name).nodes)
+
+
+class Static(Node):
+    """A plugin tag replaced by fixed text in previews (e.g. {% seo %})"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def render(self, context, out):
+        out.append(self.text)
+
+
+def render_nodes(nodes, context, out):
+    for node in nodes:
+        node.render(context, out)
+
+
+# --- Parsing -------------------------------------------------------------
+
+class Context:
+    """Variable scopes: the outermost one takes assigns"""
+
+    def __init__(self, variables):
+        self.scopes = [dict(variables)]
+
+    def get(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def assign(self, name, value):
+        self.scopes[0][name] = value
+
+    @contextmanager
+    def scope(self):
+        """A nested scope for loop variables and include params"""
+        self.scopes.append({})
+        try:
+            yield self.scopes[-1]
+        finally:
+            self.scopes.pop()
+
+
+class Template:
+    """A compiled template; render(variables) returns the output string.
+
+    first_line is the line source starts on in its file, so errors and
+    node line numbers point past any front matter that was stripped off.
+    """
+
+    def __init__(self, source, name='<template>', loader=None, static_tags=None, first_line=1):
+        self.name = name
+        self.loader = loader
+        self.static_tags = static_tags or {}
+        self.nodes = self._parse(source, first_line)
+
+    def _tokens(self, source):
+        pos = 0
+        strip_next = False
+        for match in TOKEN.finditer(source):
+            text = source[pos:match.start()]
+            if strip_next:
+                text = text.lstrip()
+            if match.group(1) == '-' or match.group(4) == '-':
+                text = text.rstrip()
+            if text:
+                yield 'text', text, pos
+            if match.group(2) is not None:
+                yield 'tag', match.group(2), match.start()
+                strip_next = match.group(3) == '-'
+            else:
+                yield 'output', match.group(5), match.start()
+                strip_next = match.group(6) == '-'
+            pos = match.end()
+        text = source[pos:]
+        if strip_next:
+            text = text.lstrip()
+        if text:
+            yield 'text', text, pos
+
+    def _parse(self, source, first_line=1):
+        root = []
+        # Stack of (node, tag name, list the next nodes go into)
+        stack = [(None, None, root)]
+        in_comment = False
+        line, counted = first_line, 0
+        for kind, content, offset in self._tokens(source):
+            line += source.count('\n', counted, offset)
+            counted = offset
+            try:
+                body = stack[-1][2]
+                if in_comment:
+                    if kind == 'tag' and content.split(None, 1)[0] == 'endcomment':
+                        in_comment = False
+                    continue
+                name, _, args = content.partition(' ') if kind == 'tag' else (None, None, '')
+                args = args.strip()
+                if kind == 'text':
+                    body.append(Text(content))
+                elif kind == 'output':
+                    body.append(Output(content))
+                elif name == 'comment':
+                    in_comment = True
+                elif name == 'assign':
+                    body.append(Assign(args))
+                elif name in ('if', 'unless'):
+                    node = Conditional(args, negate=name == 'unless')
+                    body.append(node)
+                    stack.append((node, name, node.branches[0][1]))
+                elif name in ('elsif', 'else'):
+                    node, tag, _ = stack[-1]
+                    if isinstance(node, For) and name == 'else':
+                        node.else_body = []
+                        stack[-1] = (node, tag, node.else_body)
+                    elif isinstance(node, Conditional):
+                        node.add_branch(args if name == 'elsif' else None)
+                        stack[-1] = (node, tag, node.branches[-1][1])
+                    else:
+                        raise LiquidError(f"unexpected {name}")
+                elif name == 'for':
+                    node = For(args)
+                    body.append(node)
+                    stack.append((node, name, node.body))
+                elif name in ('endif', 'endunless', 'endfor'):
+                    if len(stack) == 1 or stack[-1][1] != name[3:]:
+                        raise LiquidError(f"unexpected {name}")
+                    stack.pop()
+                elif name == 'include':
+                    if self.loader is None:
+                        raise LiquidError("include isn't available here")
+                    body.append(Include(args, self.loader))
+                elif name in self.static_tags:
+                    body.append(Static(self.static_tags[name]))
+                else:
+                    raise LiquidError(f"unsupported tag: {name}")
+                if body and body[-1].line is None:
+                    body[-1].line = line
+            except LiquidError as e:
+                raise LiquidError(f"{self.name}, line {line}: {e}") from None
+        if len(stack) > 1:
+            raise LiquidError(f"{self.name}: {{% {stack[-1][1]} %}} is never closed")
+        if in_comment:
+            raise LiquidError(f"{self.name}: {{% comment %}} is never closed")
+        return root
+
+    def render(self, variables):
+        out = []
+        render_nodes(self.nodes, variables if isinstance(variables, Context) else Context(variables), out)
+        return ''.join(out)
+
+
+class Loader:
+    """Loads and caches templates from a directory (e.g. _includes/)"""
+
+    def __init__(self, directory, static_tags=None):
+        self.directory = Path(directory)
+        self.static_tags = static_tags
+        self.cache = {}
+
+    def __call__(self, name):
+        path = self.directory / name
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            raise LiquidError(f"include not found: {name}") from None
+        cached = self.cache.get(name)
+        if cached is None or cached[0] != mtime:
+            template = Template(path.read_text(encoding='utf-8'), name, self, self.static_tags)
+            self.cache[name] = cached = (mtime, template)
+        return cached[1]
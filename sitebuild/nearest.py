@@ -0,0 +1,225 @@
+"""
+Precompute the nearest served zip for every unserved zip
+
+Reads a vendored zip-centroid table and the service area from
+content/service-areas.json, finds the closest served zip to every other
+zip in the table, and writes one small lookup file per 3-digit prefix:
+
+    service-areas/nearest/<prefix>.json   {"94121": ["94118", 1.4], ...}
+
+so the waitlist message in checkZip() can say how far away we are
+without any runtime computation. Zips further than --max-miles from the
+service area are left out.
+
+The centroid table is vendor/zip-centroids.csv: either a CSV with zip,
+lat and lon columns, or the Census Gazetteer ZCTA file (tab-separated,
+GEOID/INTPTLAT/INTPTLONG) as downloaded. Without it this step is skipped,
+and unless lookups from an earlier run exist the index written by
+sitebuild.service_areas says there are none, so checkZip() doesn't
+request them.
+
+Distances are great-circle miles. With NumPy installed the search is a
+vectorised dot product over all served zips; otherwise a KD-tree over
+unit vectors is used.
+
+Usage: python3 -m sitebuild.nearest [--centroids FILE] [--max-miles N]
+"""
+
+import csv
+import json
+import math
+import argparse
+from pathlib import Path
+
+from . import BASE_DIR
+from .service_areas import (SOURCE, OUTPUT_DIR, NEAREST_DIR, compile_service_areas, load_entries,
+                            normalise_intervals, write_if_changed)
+from .zipcheck import ServiceArea
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CENTROIDS = 'vendor/zip-centroids.csv'
+EARTH_RADIUS_MILES = 3958.8
+
+# Accepted column names, lowercased
+ZIP_COLUMNS = ('zip', 'zipcode', 'zip_code', 'zcta', 'zcta5', 'geoid')
+LAT_COLUMNS = ('lat', 'latitude', 'intptlat')
+LON_COLUMNS = ('lon', 'lng', 'long', 'longitude', 'intptlong')
+
+
+def find_column(header, names, path):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    raise ValueError(f"{path}: no {names[0]} column (expected one of {', '.join(names)})")
+
+
+def load_centroids(path):
+    """Return {zip: (lat, lon)} from a CSV or Gazetteer file"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        reader = csv.reader(f, delimiter='\t' if '\t' in first else ',')
+        header = [column.strip().lower() for column in next(reader, [])]
+        zip_col = find_column(header, ZIP_COLUMNS, path)
+        lat_col = find_column(header, LAT_COLUMNS, path)
+        lon_col = find_column(header, LON_COLUMNS, path)
+
+        centroids = {}
+        for row in reader:
+            try:
+                zip_code = row[zip_col].strip().zfill(5)
+                lat, lon = float(row[lat_col]), float(row[lon_col])
+            except (IndexError, ValueError):
+                continue
+            if len(zip_code) == 5 and zip_code.isdigit():
+                centroids[zip_code] = (lat, lon)
+    return centroids
+
+
+def unit_vector(lat, lon):
+    """Point on the unit sphere; chord distance between these orders like great-circle distance"""
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_miles(chord):
+    return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_MILES
+
+
+class KDTree:
+    """Minimal 3-d KD-tree for nearest-neighbour queries (stdlib fallback)"""
+
+    def __init__(self, points):
+        # points: [(vector, label)]
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, axis):
+        if not points:
+            return None
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        return (points[middle], axis,
+                self._build(points[:middle], (axis + 1) % 3),
+                self._build(points[middle + 1:], (axis + 1) % 3))
+
+    def nearest(self, target):
+        """Return (label, squared chord distance) of the closest point"""
+        best = [None, math.inf]
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            (vector, label), axis, left, right = node
+            distance = ((vector[0] - target[0]) ** 2 + (vector[1] - target[1]) ** 2
+                        + (vector[2] - target[2]) ** 2)
+            if distance < best[1]:
+                best = [label, distance]
+            delta = target[axis] - vector[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            # Pushed first so it's visited last, once best has tightened
+            if delta * delta < best[1]:
+                stack.append(far)
+            stack.append(near)
+        return best[0], best[1]
+
+
+def nearest_served(queries, served):
+    """Yield (zip, nearest served zip, miles) for each query zip.
+
+    queries and served are lists of (zip, (lat, lon)).
+    """
+    if not served:
+        return
+    if numpy is not None:
+        served_zips = [zip_code for zip_code, _ in served]
+        served_vectors = numpy.array([unit_vector(*point) for _, point in served])
+        # Keep each chunk's distance matrix around 32 MB
+        chunk = max(1, (1 << 22) // len(served))
+        for offset in range(0, len(queries), chunk):
+            batch = queries[offset:offset + chunk]
+            vectors = numpy.array([unit_vector(*point) for _, point in batch])
+            dots = vectors @ served_vectors.T
+            best = dots.argmax(axis=1)
+            angles = numpy.arccos(numpy.clip(dots[numpy.arange(len(batch)), best], -1.0, 1.0))
+            for (zip_code, _), index, angle in zip(batch, best, angles):
+                yield zip_code, served_zips[index], float(angle) * EARTH_RADIUS_MILES
+        return
+
+    tree = KDTree((unit_vector(*point), zip_code) for zip_code, point in served)
+    for zip_code, point in queries:
+        label, distance = tree.nearest(unit_vector(*point))
+        yield zip_code, label, chord_to_miles(math.sqrt(distance))
+
+
+def build_lookup(centroids, area, max_miles):
+    """Return {prefix: {zip: [nearest served zip, miles]}}"""
+    served, unserved = [], []
+    for zip_code, point in sorted(centroids.items()):
+        (served if area.table[int(zip_code)] else unserved).append((zip_code, point))
+
+    lookup = {}
+    for zip_code, nearest, miles in nearest_served(unserved, served):
+        if miles <= max_miles:
+            lookup.setdefault(zip_code[:3], {})[zip_code] = [nearest, round(miles, 1)]
+    return lookup, len(served), len(unserved)
+
+
+def write_lookup(lookup, out_dir):
+    """Write the per-prefix files, deleting stale ones; returns (written, removed)"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {f'{prefix}.json': json.dumps(entries, separators=(',', ':'), sort_keys=True).encode('utf-8')
+             for prefix, entries in lookup.items()}
+    written = sum(write_if_changed(out_dir / name, data) for name, data in files.items())
+    removed = 0
+    for path in out_dir.iterdir():
+        if path.is_file() and path.name not in files:
+            path.unlink()
+            removed += 1
+    return written, removed
+
+
+def compile_nearest(base_dir=BASE_DIR, centroids_path=None, max_miles=50):
+    """Build the lookup files; returns a summary dict, or None without a centroid table"""
+    base_dir = Path(base_dir)
+    centroids_path = Path(centroids_path) if centroids_path else base_dir / CENTROIDS
+    if not centroids_path.exists():
+        return None
+    centroids = load_centroids(centroids_path)
+    intervals, _ = normalise_intervals(load_entries(base_dir / SOURCE))
+    lookup, served, unserved = build_lookup(centroids, ServiceArea(intervals), max_miles)
+    written, removed = write_lookup(lookup, base_dir / OUTPUT_DIR / NEAREST_DIR)
+    # Refresh the index's nearest flag now the lookups exist (or don't)
+    compile_service_areas(base_dir)
+    return {'centroids': len(centroids), 'served': served, 'unserved': unserved,
+            'within': sum(len(entries) for entries in lookup.values()),
+            'prefixes': len(lookup), 'written': written, 'removed': removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the nearest served zip for unserved zips")
+    parser.add_argument('--centroids', metavar='FILE', help=f"zip centroid table (default: {CENTROIDS})")
+    parser.add_argument('--max-miles', type=float, default=50, metavar='N',
+                        help="leave out zips further than this from the service area (default: 50)")
+    args = parser.parse_args()
+
+    print("📍 Computing nearest served zips...")
+    summary = compile_nearest(centroids_path=args.centroids, max_miles=args.max_miles)
+    if summary is None:
+        print(f"⚠️  No zip centroid table at {args.centroids or CENTROIDS}, skipping")
+        return
+    if not summary['served']:
+        print("⚠️  No served zip has a centroid in the table")
+    print(f"✅ {summary['within']:,} of {summary['unserved']:,} unserved zips within "
+          f"{args.max_miles:g} miles of {summary['served']:,} served zips "
+          f"({'NumPy' if numpy is not None else 'KD-tree'}, {summary['prefixes']} prefix files, "
+          f"{summary['written']} written, {summary['removed']} removed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Precompress the built site: .gz and .br next to every compressible file
+
+Writes <file>.gz (gzip -9) and, when the brotli module is installed,
+<file>.br (quality 11) for every HTML/CSS/JS/JSON/XML/SVG/text file in
+_site/, so a server can send the precompressed bytes with no CPU per
+request. Files that don't shrink are left alone.
+
+Jekyll deletes anything it didn't generate from _site/ on every build,
+so the compressed outputs live in .precompress-cache/, named after the
+content hash of their source, and are hard-linked (or copied) into
+place. Only files whose content changed since the last run are
+compressed again, across a process pool.
+
+Usage: python3 -m sitebuild.precompress [--jobs N]
+"""
+
+import os
+import gzip
+import shutil
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from . import BASE_DIR
+from .datafiles import materialise
+from .digests import file_digest
+from .files import atomic_write
+from .metrics import Metrics, Progress
+from .site import site_dir
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_DIR = '.precompress-cache'
+
+EXTENSIONS = ('.html', '.css', '.js', '.mjs', '.json', '.xml', '.svg', '.txt',
+              '.map', '.webmanifest', '.ico')
+
+# Below this, compression headers cost more than they save
+MIN_SIZE = 256
+
+
+def encodings():
+    """The encodings available here, as (suffix, compress function) pairs"""
+    available = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        available.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return available
+
+
+def cache_path(cache_dir, digest, suffix):
+    return Path(cache_dir) / digest[:2] / f'{digest}{suffix}'
+
+
+def compress_file(job):
+    """Compress one file into the cache; runs in a worker process.
+
+    Writes an empty file for an encoding that doesn't shrink the source,
+    so the result is remembered either way. Returns (bytes read, outputs
+    written, bytes written); the empty markers don't count as outputs.
+    """
+    source, digest, cache_dir, suffixes = job
+    data = Path(source).read_bytes()
+    compressors = dict(encodings())
+    outputs = written = 0
+    for suffix in suffixes:
+        compressed = compressors[suffix](data)
+        if len(compressed) >= len(data):
+            compressed = b''
+        atomic_write(cache_path(cache_dir, digest, suffix), compressed)
+        if compressed:
+            outputs += 1
+            written += len(compressed)
+    return len(data), outputs, written
+
+
+def compressible_files(directory):
+    return sorted(path for path in Path(directory).rglob('*')
+                  if path.suffix.lower() in EXTENSIONS and path.is_file()
+                  and path.stat().st_size >= MIN_SIZE)
+
+
+def precompress_site(base_dir=BASE_DIR, jobs=None, metrics=None):
+    """Precompress _site/; returns a summary dict"""
+    directory = site_dir(base_dir)
+    cache_dir = Path(base_dir) / CACHE_DIR
+    metrics = metrics or Metrics()
+    suffixes = [suffix for suffix, _ in encodings()]
+
+    files = [(path, file_digest(path)) for path in compressible_files(directory)]
+    pending = []
+    for path, digest in files:
+        missing = [suffix for suffix in suffixes if not cache_path(cache_dir, digest, suffix).exists()]
+        if missing:
+            pending.append((str(path), digest, str(cache_dir), missing))
+
+    if pending:
+        progress = Progress("   compressed")
+        with metrics.step('compress'), ProcessPoolExecutor(max_workers=jobs) as pool:
+            for nbytes, outputs, written in pool.map(compress_file, pending):
+                metrics.record('compress', files=outputs, nbytes=written)
+                progress.advance(nbytes=nbytes)
+        progress.close()
+
+    totals = {'files': len(files), 'compressed': len(pending), 'original': 0}
+    used = set()
+    with metrics.step('link'):
+        for path, digest in files:
+            totals['original'] += path.stat().st_size
+            for suffix in suffixes:
+                cached = cache_path(cache_dir, digest, suffix)
+                used.add(cached)
+                target = path.with_name(path.name + suffix)
+                size = cached.stat().st_size
+                if not size:
+                    if target.exists():
+                        target.unlink()
+                    continue
+                method = materialise(cached, target, 'hardlink')
+                if method != 'unchanged':
+                    # A hard link adds no data; only a fallback copy does
+                    metrics.record('link', nbytes=size if method == 'copy' else 0)
+                totals[suffix] = totals.get(suffix, 0) + size
+
+    # Forget outputs for content that's no longer in the site
+    if cache_dir.is_dir():
+        for cached in cache_dir.rglob('*'):
+            if cached.is_file() and cached not in used:
+                cached.unlink()
+        for bucket in cache_dir.iterdir():
+            if bucket.is_dir() and not any(bucket.iterdir()):
+                shutil.rmtree(bucket)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .gz/.br versions of the built site's text files")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if not site_dir().is_dir():
+        print("⚠️  No _site/ yet, run jekyll build first")
+        return
+    print("🗜️  Precompressing _site/...")
+    if brotli is None:
+        print("   (brotli isn't installed, writing .gz only)")
+    metrics = Metrics()
+    totals = precompress_site(jobs=max(1, args.jobs), metrics=metrics)
+    sizes = ', '.join(f"{suffix} {totals[suffix]:,} bytes" for suffix in ('.gz', '.br') if suffix in totals)
+    print(f"✅ {totals['files']} file(s), {totals['compressed']} compressed, "
+          f"{totals['original']:,} bytes → {sizes or 'nothing smaller'}")
+    metrics.print_report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+"""
+Render pages without Jekyll, for quick previews and CI smoke tests
+
+Builds the same `site` Jekyll would (_config.yml, every _data/ file, the
+collections with their front matter) and renders a page into its layout
+with sitebuild.liquid, in a few milliseconds and without Ruby. The
+collection snapshots (site.data.steps, ...) are built in memory the way
+sitebuild.bundle writes them, so a preview always shows the current
+collection files.
+
+--watch and --serve render incrementally: only the inputs that changed
+are read again, and only the template fragments that depend on them
+(see sitebuild.fragments) are rendered and spliced into the last output.
+An edited FAQ re-renders the FAQ loop and nothing else. Changes to
+_config.yml, layouts, includes or the page itself render everything.
+
+{% seo %} comes from a Jekyll plugin and renders as a placeholder
+comment. Anything else the renderer doesn't support fails the render.
+
+    python3 -m sitebuild.preview                 # writes _preview/index.html
+    python3 -m sitebuild.preview --check         # render only; exit 1 on errors
+    python3 -m sitebuild.preview --watch         # re-render _preview/ on every edit
+    python3 -m sitebuild.preview --serve 4001    # re-render on every request
+    python3 -m sitebuild.preview --graph         # which sections each input feeds
+
+Usage: python3 -m sitebuild.preview [PAGE ...] [--output DIR] [--check | --watch | --serve PORT | --graph]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from . import BASE_DIR
+from .collections import (SORT_KEYS, COLLECTION_EXTENSIONS, load_config, collection_dirs,
+                          collection_files, sort_items)
+from .files import atomic_write
+from .fragments import FragmentCache, FragmentGraph
+from .frontmatter import read_front_matter, parse_front_matter, split_front_matter, yaml
+from .liquid import Template, Loader, LiquidError
+
+OUTPUT_DIR = '_preview'
+DEFAULT_PAGES = ('index.html',)
+DATA_EXTENSIONS = ('.json', '.yml', '.yaml')
+
+# Plugin tags and what they render as in a preview
+STATIC_TAGS = {'seo': '<!-- jekyll-seo-tag (rendered by Jekyll) -->'}
+
+# Document keys that aren't front matter, left out of the site.data snapshots
+DOCUMENT_KEYS = ('content', 'collection', 'path', 'slug')
+
+
+def load_data_file(path):
+    if path.suffix == '.json':
+        return json.loads(path.read_text(encoding='utf-8'))
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read YAML data files (pip install pyyaml)")
+    return yaml.safe_load(path.read_text(encoding='utf-8'))
+
+
+def load_data(directory):
+    """Read _data/ like Jekyll: {file stem: contents}, subdirectories as nested dicts"""
+    data = {}
+    directory = Path(directory)
+    if not directory.is_dir():
+        return data
+    for path in sorted(directory.iterdir()):
+        if path.name.startswith(('.', '_')):
+            continue
+        if path.is_dir():
+            data[path.name] = load_data(path)
+        elif path.suffix in DATA_EXTENSIONS:
+            data[path.stem] = load_data_file(path)
+    return data
+
+
+def load_document(name, path):
+    """A collection document: front matter plus content, path and slug"""
+    front_matter, content = read_front_matter(path)
+    return {**front_matter, 'content': content, 'collection': name,
+            'path': f'_{name}/{path.name}', 'slug': path.stem}
+
+
+def set_collection(site, name, documents):
+    """Set site.<name>, and the site.data.<name> snapshot sitebuild.bundle would write"""
+    site[name] = documents
+    items = [{key: value for key, value in document.items() if key not in DOCUMENT_KEYS}
+             for document in documents]
+    site['data'][name] = sort_items(items, SORT_KEYS.get(name, 'order'))
+
+
+def load_site(base_dir=BASE_DIR):
+    """The `site` variable for a render"""
+    base_dir = Path(base_dir)
+    config = load_config(base_dir)
+    site = dict(config)
+    site['data'] = load_data(base_dir / '_data')
+    for name, directory in collection_dirs(config, base_dir).items():
+        set_collection(site, name, [load_document(name, path) for path in collection_files(directory)])
+    return site
+
+
+def read_template(path):
+    """Read a page or layout into (front matter, body, line the body starts on).
+
+    Layouts may have no front matter.
+    """
+    text = Path(path).read_text(encoding='utf-8')
+    if split_front_matter(text)[0] is None:
+        return {}, text, 1
+    front_matter, body = parse_front_matter(text, str(path))
+    return front_matter, body, text.count('\n', 0, len(text) - len(body)) + 1
+
+
+class SiteState:
+    """The site, kept current by re-reading only the input files that changed"""
+
+    def __init__(self, base_dir=BASE_DIR, pages=DEFAULT_PAGES):
+        self.base_dir = Path(base_dir)
+        self.pages = list(pages)
+        self.reload()
+
+    def reload(self):
+        config = load_config(self.base_dir)
+        self.collections = {directory.relative_to(self.base_dir).as_posix(): name
+                            for name, directory in collection_dirs(config, self.base_dir).items()}
+        self.site = load_site(self.base_dir)
+        self.documents = {name: {document['path']: document for document in self.site[name]}
+                          for name in self.collections.values()}
+        self.stamps = self.scan()
+
+    def scan(self):
+        """{input file: (mtime, size)} for everything a render reads"""
+        stamps = {}
+        base = str(self.base_dir)
+
+        def add(path):
+            try:
+                st = os.stat(os.path.join(base, path))
+            except OSError:
+                return
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+
+        # os.scandir rather than pathlib: this runs on every refresh, over every content file
+        def walk(directory, extensions=None, recursive=True):
+            try:
+                entries = list(os.scandir(os.path.join(base, directory)))
+            except OSError:
+                return
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                path = f'{directory}/{entry.name}'
+                if entry.is_dir():
+                    if recursive:
+                        walk(path, extensions)
+                elif extensions is None or os.path.splitext(entry.name)[1] in extensions:
+                    st = entry.stat()
+                    stamps[path] = (st.st_mtime_ns, st.st_size)
+
+        add('_config.yml')
+        for page in self.pages:
+            add(page)
+        walk('_layouts')
+        walk('_includes')
+        walk('_data', DATA_EXTENSIONS)
+        for directory in self.collections:
+            walk(directory, COLLECTION_EXTENSIONS, recursive=False)
+        return stamps
+
+    def refresh(self):
+        """Pick up changed inputs.
+
+        Returns the data paths that changed (empty if nothing did), or
+        None if a template or _config.yml changed and everything has to
+        be rendered again.
+        """
+        stamps = self.scan()
+        changed = [path for path in stamps.keys() | self.stamps.keys()
+                   if stamps.get(path) != self.stamps.get(path)]
+        self.stamps = stamps
+        keys = set()
+        for path in sorted(changed):
+            updated = self.update(path)
+            if updated is None:
+                self.reload()
+                return None
+            keys |= updated
+        return keys
+
+    def update(self, path):
+        """Re-read one input into the site; returns the data paths it changed, or None"""
+        directory, _, rest = path.rpartition('/')
+        if directory in self.collections:
+            name = self.collections[directory]
+            documents = self.documents[name]
+            source = self.base_dir / path
+            key = f'_{name}/{rest}'
+            if source.exists():
+                documents[key] = load_document(name, source)
+            else:
+                documents.pop(key, None)
+            set_collection(self.site, name, [documents[key] for key in sorted(documents)])
+            return {f'site.{name}', f'site.data.{name}'}
+
+        if path.startswith('_data/'):
+            parts = Path(path[len('_data/'):]).with_suffix('').parts
+            if len(parts) == 1 and parts[0] in self.documents:
+                # A sitebuild.bundle snapshot; the collection itself is what's shown
+                return set()
+            data = self.site['data']
+            for part in parts[:-1]:
+                data = data.setdefault(part, {})
+            source = self.base_dir / path
+            if source.exists():
+                data[parts[-1]] = load_data_file(source)
+            else:
+                data.pop(parts[-1], None)
+            return {'site.data.' + '.'.join(parts)}
+        return None
+
+
+class Renderer:
+    """Renders pages of one site; templates are parsed once and re-parsed when they change"""
+
+    def __init__(self, base_dir=BASE_DIR):
+        self.base_dir = Path(base_dir)
+        self.includes = Loader(self.base_dir / '_includes', STATIC_TAGS)
+        self.templates = {}
+        # (template path, page) -> FragmentCache, and the content each layout last wrapped
+        self.fragments = {}
+        self.contents = {}
+
+    def template(self, path):
+        """Parse a page or layout: returns (front matter, Template)"""
+        path = Path(path)
+        mtime = path.stat().st_mtime_ns
+        cached = self.templates.get(path)
+        if cached is None or cached[0] != mtime:
+            front_matter, body, first_line = read_template(path)
+            name = path.relative_to(self.base_dir).as_posix()
+            template = Template(body, name, self.includes, STATIC_TAGS, first_line)
+            cached = self.templates[path] = (mtime, front_matter, template)
+        return cached[1], cached[2]
+
+    def default_layout(self, site):
+        for default in site.get('defaults') or []:
+            if not (default.get('scope') or {}).get('path'):
+                return (default.get('values') or {}).get('layout')
+        return None
+
+    def layouts(self, front_matter, site):
+        """The chain of layouts a page renders into: [(path, front matter, Template)]"""
+        chain = []
+        layout = front_matter.get('layout', self.default_layout(site))
+        while layout and layout != 'none':
+            if any(path.stem == layout for path, _, _ in chain):
+                raise LiquidError(f"layout loop: {layout}")
+            path = self.base_dir / '_layouts' / f'{layout}.html'
+            if not path.exists():
+                raise LiquidError(f"layout not found: {layout}")
+            layout_front_matter, template = self.template(path)
+            chain.append((path, layout_front_matter, template))
+            layout = layout_front_matter.get('layout')
+        return chain
+
+    def render_fragments(self, key, template, variables, changed):
+        cache = self.fragments.get(key)
+        # A full render also rebuilds the graph, in case an include changed
+        if changed is None or cache is None or cache.template is not template:
+            cache = self.fragments[key] = FragmentCache(template)
+            changed = None
+        return cache.render(variables, changed)
+
+    def render(self, page_path, site=None, changed=None):
+        """Render a page through its layouts.
+
+        changed: the data paths that changed since this page was last
+        rendered (SiteState.refresh()), to re-render only the fragments
+        they affect; None renders everything. Returns (HTML, fragments
+        rendered).
+        """
+        site = site if site is not None else load_site(self.base_dir)
+        page_path = self.base_dir / page_path
+        front_matter, template = self.template(page_path)
+        name = page_path.relative_to(self.base_dir).as_posix()
+        url = '/' + (name[:-len('index.html')] if name.endswith('index.html') else name)
+        page = {**front_matter, 'path': name, 'url': url}
+        variables = {'site': site, 'page': page}
+        html, rendered = self.render_fragments((page_path, name), template, variables, changed)
+
+        for path, layout_front_matter, layout_template in self.layouts(front_matter, site):
+            key = (path, name)
+            layout_changed = changed
+            if changed is not None and self.contents.get(key) != html:
+                layout_changed = changed | {'content'}
+            self.contents[key] = html
+            html, count = self.render_fragments(
+                key, layout_template, {**variables, 'content': html, 'layout': layout_front_matter},
+                layout_changed)
+            rendered += count
+        return html, rendered
+
+    def graph(self, page_path, site):
+        """[(template name, FragmentGraph)] for a page and its layouts"""
+        front_matter, template = self.template(self.base_dir / page_path)
+        return [(template.name, FragmentGraph(template))] + [
+            (layout.name, FragmentGraph(layout)) for _, _, layout in self.layouts(front_matter, site)]
+
+
+class LivePreview:
+    """Keeps rendered pages current, re-rendering only what each change affects"""
+
+    def __init__(self, base_dir=BASE_DIR, pages=DEFAULT_PAGES):
+        self.state = SiteState(base_dir, pages)
+        self.renderer = Renderer(base_dir)
+        # Page -> data paths changed since it was last rendered (None: render everything)
+        self.pending = dict.fromkeys(pages)
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Check the inputs; returns True if anything changed"""
+        with self.lock:
+            changed = self.state.refresh()
+            for page, pending in self.pending.items():
+                self.pending[page] = None if changed is None or pending is None else pending | changed
+            return changed is None or bool(changed)
+
+    def render(self, page):
+        """Returns (HTML, fragments rendered, milliseconds)"""
+        with self.lock:
+            start = time.perf_counter()
+            changed = self.pending.get(page)
+            # Until it renders successfully, the page needs a full render
+            self.pending[page] = None
+            html, rendered = self.renderer.render(page, self.state.site, changed)
+            self.pending[page] = set()
+            return html, rendered, (time.perf_counter() - start) * 1000
+
+
+def render_pages(pages, base_dir=BASE_DIR, output_dir=None):
+    """Render pages (writing them under output_dir if given); returns {page: (bytes, ms)}"""
+    renderer = Renderer(base_dir)
+    site = load_site(base_dir)
+    results = {}
+    for page in pages:
+        start = time.perf_counter()
+        html = renderer.render(page, site)[0].encode('utf-8')
+        results[page] = (len(html), (time.perf_counter() - start) * 1000)
+        if output_dir is not None:
+            atomic_write(Path(output_dir) / page, html)
+    return results
+
+
+def watch(pages, output_dir, base_dir=BASE_DIR, interval=0.2):
+    """Render the pages, then re-render whatever each edit affects"""
+    live = LivePreview(base_dir, pages)
+    print(f"👀 Watching for changes, writing {output_dir}/ (Ctrl+C to stop)")
+    try:
+        first = True
+        while True:
+            if live.refresh() or first:
+                for page in pages:
+                    try:
+                        html, rendered, ms = live.render(page)
+                    except (LiquidError, OSError, ValueError) as e:
+                        print(f"❌ {e}")
+                        continue
+                    atomic_write(Path(base_dir) / output_dir / page, html.encode('utf-8'))
+                    print(f"   ✓ {page}: {rendered} fragment(s) rendered in {ms:.1f} ms")
+                first = False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def serve(port, pages, base_dir=BASE_DIR):
+    """Serve the project, bringing the pages up to date on every request"""
+    live = LivePreview(base_dir, pages)
+    routes = {}
+    for page in pages:
+        routes['/' + page] = page
+        if page.endswith('index.html'):
+            routes['/' + page[:-len('index.html')]] = page
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(base_dir), **kwargs)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path in routes:
+                try:
+                    live.refresh()
+                    body = live.render(routes[path])[0].encode('utf-8')
+                    status = 200
+                except (LiquidError, OSError, ValueError) as e:
+                    body = f"<pre>Preview failed: {e}</pre>".encode('utf-8')
+                    status = 500
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+            elif any(part.startswith(('_', '.')) for part in path.split('/')):
+                self.send_error(404)
+            else:
+                super().do_GET()
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"👀 Previewing at http://127.0.0.1:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def describe(node):
+    """A short label for a template fragment"""
+    source = getattr(node, 'source', None)
+    if source is None:
+        return type(node).__name__.lower()
+    tag = type(node).__name__.lower()
+    if tag == 'output':
+        return f"{{{{ {source} }}}}"
+    if tag == 'conditional':
+        tag = 'unless' if node.negate else 'if'
+    return f"{{% {tag} {source} %}}"
+
+
+def print_graph(pages, base_dir=BASE_DIR):
+    """Print which template sections each collection and data file feeds"""
+    state = SiteState(base_dir, pages)
+    renderer = Renderer(base_dir)
+    inputs = [(f'{directory}/', {f'site.{name}', f'site.data.{name}'})
+              for directory, name in state.collections.items()]
+    for path in sorted(state.stamps):
+        if path.startswith('_data/'):
+            parts = Path(path[len('_data/'):]).with_suffix('').parts
+            if not (len(parts) == 1 and parts[0] in state.documents):
+                inputs.append((path, {'site.data.' + '.'.join(parts)}))
+    graphs = [graph for page in pages for graph in renderer.graph(page, state.site)]
+    for name, keys in inputs:
+        sections = []
+        for template_name, graph in graphs:
+            consumers = {id(node) for key in keys for node in graph.consumers(key)}
+            sections += [f"{template_name}:{node.line} {describe(node)}"
+                         for node in graph.nodes if id(node) in consumers]
+        print(f"   {name}")
+        for section in sections or ["(not used)"]:
+            print(f"      → {section}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render pages without Jekyll")
+    parser.add_argument('pages', nargs='*', default=list(DEFAULT_PAGES), metavar='PAGE',
+                        help="pages to render, relative to the project (default: index.html)")
+    parser.add_argument('--output', '-o', default=OUTPUT_DIR,
+                        help=f"directory to write the rendered pages to (default: {OUTPUT_DIR}/)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check', action='store_true', help="render without writing; exit 1 on errors")
+    mode.add_argument('--watch', '-w', action='store_true',
+                      help="keep running and re-render the fragments each edit affects")
+    mode.add_argument('--serve', type=int, metavar='PORT', help="serve previews, brought up to date per request")
+    mode.add_argument('--graph', action='store_true', help="show which template sections each input feeds")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.pages)
+        return
+    if args.watch:
+        watch(args.pages, args.output)
+        return
+    if args.graph:
+        print("🕸️  Content dependencies:")
+        print_graph(args.pages)
+        return
+    print("👀 Rendering preview...")
+    try:
+        results = render_pages(args.pages, output_dir=None if args.check else BASE_DIR / args.output)
+    except (LiquidError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for page, (nbytes, ms) in results.items():
+        target = page if args.check else f"{args.output}/{page}"
+        print(f"   ✓ {target} ({nbytes:,} bytes, {ms:.1f} ms)")
+    print(f"✅ {len(results)} page(s) rendered")
+
+
+if __name__ == '__main__':
+    main()
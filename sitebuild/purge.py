@@ -0,0 +1,106 @@
+"""
+Remove unused rules from the built stylesheets
+
+Collects every tag, class, id and attribute used by the pages in _site/,
+plus the classes and elements its scripts add at runtime (scrolled,
+active, visible, success, error, ...), and drops the selectors in
+_site/**/*.css that can't match any of them. Rules and @media blocks
+left empty go too.
+
+Classes added in ways the script scan can't see belong in ALLOWLIST or
+--keep, so their rules stay even when no page uses them. Content-driven
+classes (e.g. a featured pricing plan) need no entry: this runs after
+every `jekyll build`, on the fresh stylesheet and the pages as built.
+
+Usage: python3 -m sitebuild.purge [--keep CLASS ...] [--minify] [--verbose]
+"""
+
+import argparse
+
+from . import BASE_DIR
+from .css import (parse_stylesheet, serialize, filter_rules, split_selectors, new_usage,
+                  html_usage, js_classes, js_tags, selector_used, Rule)
+from .files import atomic_write
+from .site import site_dir, html_pages
+
+# Classes kept even when no built page uses them: main.js's state classes,
+# in case a refactor hides them from the script scan
+ALLOWLIST = {
+    'scrolled',     # header, once the page is scrolled
+    'active',       # open mobile menu and FAQ items
+    'visible',      # .fade-in elements once in view
+    'success',      # zip checker result
+    'error',
+}
+
+
+def site_usage(directory, keep=()):
+    """Everything the built pages and scripts use, plus the allowlist"""
+    usage = new_usage()
+    for path in html_pages(directory):
+        html_usage(path.read_text(encoding='utf-8'), usage)
+    for path in sorted(directory.rglob('*.js')):
+        source = path.read_text(encoding='utf-8')
+        usage['classes'] |= js_classes(source)
+        usage['tags'] |= js_tags(source)
+    usage['classes'] |= ALLOWLIST | set(keep)
+    return usage
+
+
+def removed_selectors(nodes, usage):
+    """The selectors purge_stylesheet would drop, for --verbose"""
+    removed = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            removed += [s for s in split_selectors(node.selector) if not selector_used(s, usage)]
+        elif node.children is not None:
+            removed += removed_selectors(node.children, usage)
+    return removed
+
+
+def purge_stylesheet(path, usage, minify=False):
+    """Rewrite one stylesheet; returns (bytes before, bytes after, removed selectors)"""
+    text = path.read_text(encoding='utf-8')
+    nodes = parse_stylesheet(text)
+    kept = filter_rules(nodes, lambda selector: selector_used(selector, usage))
+    css = serialize(kept, minify=minify) + '\n'
+    atomic_write(path, css.encode('utf-8'))
+    return len(text.encode('utf-8')), len(css.encode('utf-8')), removed_selectors(nodes, usage)
+
+
+def purge_site(base_dir=BASE_DIR, keep=(), minify=False):
+    """Purge every stylesheet in _site/; returns {stylesheet: (before, after, removed)}"""
+    directory = site_dir(base_dir)
+    usage = site_usage(directory, keep)
+    return {path.relative_to(directory).as_posix(): purge_stylesheet(path, usage, minify)
+            for path in sorted(directory.rglob('*.css'))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove unused CSS rules from the built site")
+    parser.add_argument('--keep', nargs='+', default=[], metavar='CLASS',
+                        help="extra classes to keep rules for")
+    parser.add_argument('--minify', action='store_true', help="also minify the stylesheets")
+    parser.add_argument('--verbose', '-v', action='store_true', help="list the removed selectors")
+    args = parser.parse_args()
+
+    if not site_dir().is_dir():
+        print("⚠️  No _site/ yet, run jekyll build first")
+        return
+    print("✂️  Purging unused CSS...")
+    results = purge_site(keep=args.keep, minify=args.minify)
+    total_before = total_after = 0
+    for name, (before, after, removed) in results.items():
+        total_before += before
+        total_after += after
+        saved = 100 * (before - after) / before if before else 0
+        print(f"   ✓ {name}: {before:,} → {after:,} bytes (-{saved:.0f}%), "
+              f"{len(removed)} unused selector(s) removed")
+        if args.verbose:
+            for selector in removed:
+                print(f"      - {selector}")
+    print(f"✅ {len(results)} stylesheet(s), {total_before:,} → {total_after:,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Compile content/service-areas.json into a zip bitmap index
+
+Each CMS entry (a bare string or a {"zip": ...} object) can be:
+
+    94102           a single zip
+    94102-94134     an inclusive range
+    941*            every zip starting with a prefix
+
+Entries are merged into a sorted list of inclusive intervals and a
+100,000-bit bitmap (bit n set = zip n served, 12.5 KB), so membership is
+a constant-time bit test. The output in service-areas/ is:
+
+    all.<hash>.bin    the full bitmap, least significant bit first,
+                      at a content-hashed URL
+    all.bin           the same, for pages without the index below
+
+checkZip() in main.js doesn't fetch anything per check: the build also
+writes _data/service_area_index.json (the bitmap's version hash and
+hashed URL, the intervals themselves while they're small, and whether
+sitebuild.nearest has written lookups), which the layout inlines into
+the page. However many zips are served, the browser downloads at most
+the fixed-size bitmap, once, and keeps it in localStorage until the
+hash changes.
+
+Usage: python3 -m sitebuild.service_areas
+"""
+
+import re
+import json
+import hashlib
+from pathlib import Path
+
+from . import BASE_DIR
+from .files import atomic_write
+
+SOURCE = 'content/service-areas.json'
+OUTPUT_DIR = 'service-areas'
+NEAREST_DIR = 'nearest'
+INDEX_DATA = '_data/service_area_index.json'
+
+# Intervals up to this size (as JSON) are inlined into the page
+INLINE_LIMIT = 2048
+
+ZIP_COUNT = 100000
+BITMAP_BYTES = ZIP_COUNT // 8
+
+SINGLE = re.compile(r'(\d{5})')
+RANGE = re.compile(r'(\d{5})\s*-\s*(\d{5})')
+PREFIX = re.compile(r'(\d{1,5})\*')
+
+
+def load_entries(path):
+    """Return the raw zip_codes list from the CMS file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    return data.get('zip_codes') or []
+
+
+def parse_entry(entry):
+    """Return the inclusive (start, end) zip interval of an entry, or None"""
+    value = entry.get('zip') if isinstance(entry, dict) else entry
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = f'{value:05d}'
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+
+    match = SINGLE.fullmatch(value)
+    if match:
+        return int(value), int(value)
+    match = RANGE.fullmatch(value)
+    if match:
+        start, end = int(match.group(1)), int(match.group(2))
+        return (start, end) if start <= end else None
+    match = PREFIX.fullmatch(value)
+    if match:
+        scale = 10 ** (5 - len(match.group(1)))
+        start = int(match.group(1)) * scale
+        return start, start + scale - 1
+    return None
+
+
+def merge_intervals(intervals):
+    """Sort intervals and merge the ones that overlap or touch"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+
+def normalise_intervals(entries):
+    """Return (merged intervals, rejected entries)"""
+    intervals = []
+    rejected = []
+    for entry in entries:
+        interval = parse_entry(entry)
+        if interval:
+            intervals.append(interval)
+        else:
+            rejected.append(entry)
+    return merge_intervals(intervals), rejected
+
+
+def build_bitmap(intervals):
+    """Return the 100,000-bit membership bitmap for a list of intervals"""
+    bits = 0
+    for start, end in intervals:
+        bits |= ((1 << (end - start + 1)) - 1) << start
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def bitmap_has(bitmap, zip_number):
+    """Constant-time membership test"""
+    return bool(bitmap[zip_number >> 3] & (1 << (zip_number & 7)))
+
+
+def write_if_changed(path, data):
+    """Write data unless path already holds it; returns True if written"""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    atomic_write(path, data)
+    return True
+
+
+def has_nearest(out_dir):
+    """Check whether sitebuild.nearest has written any lookup files"""
+    nearest_dir = Path(out_dir) / NEAREST_DIR
+    return nearest_dir.is_dir() and any(nearest_dir.glob('*.json'))
+
+
+def index_data(intervals, bitmap, nearest=False):
+    """Return the page data for _data/service_area_index.json"""
+    version = hashlib.sha256(bitmap).hexdigest()[:12]
+    # nearest tells checkZip() whether there are nearest/<prefix>.json files to fetch
+    data = {'version': version, 'url': f'/{OUTPUT_DIR}/all.{version}.bin', 'nearest': nearest}
+    if len(json.dumps(intervals, separators=(',', ':'))) <= INLINE_LIMIT:
+        data['intervals'] = intervals
+    return data
+
+
+def write_index(bitmap, url, out_dir):
+    """Write the bitmap files, deleting stale ones (old hashed copies, shards).
+
+    Returns (files written, files removed).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {'all.bin': bitmap, Path(url).name: bitmap}
+
+    written = sum(write_if_changed(out_dir / name, data) for name, data in files.items())
+    removed = 0
+    for path in out_dir.iterdir():
+        if path.is_file() and path.name not in files:
+            path.unlink()
+            removed += 1
+    return written, removed
+
+
+def compile_service_areas(base_dir=BASE_DIR):
+    """Build the index; returns a summary dict"""
+    base_dir = Path(base_dir)
+    intervals, rejected = normalise_intervals(load_entries(base_dir / SOURCE))
+    bitmap = build_bitmap(intervals)
+    data = index_data(intervals, bitmap, has_nearest(base_dir / OUTPUT_DIR))
+    written, removed = write_index(bitmap, data['url'], base_dir / OUTPUT_DIR)
+    written += write_if_changed(base_dir / INDEX_DATA,
+                                json.dumps(data, separators=(',', ':')).encode('utf-8'))
+    return {'zips': sum(end - start + 1 for start, end in intervals),
+            'intervals': len(intervals), 'written': written,
+            'removed': removed, 'rejected': rejected, 'version': data['version'],
+            'inline': 'intervals' in data}
+
+
+def main():
+    print("🗺️  Compiling service area index...")
+    summary = compile_service_areas()
+    for entry in summary['rejected']:
+        print(f"⚠️  Skipped invalid zip entry: {json.dumps(entry)}")
+    print(f"✅ {summary['zips']:,} zips in {summary['intervals']} ranges "
+          f"({summary['written']} files written, "
+          f"{summary['removed']} removed)")
+    print(f"   version {summary['version']}, "
+          f"{'inlined in the page' if summary['inline'] else 'fetched from its hashed URL'}")
+
+
+if __name__ == '__main__':
+    main()
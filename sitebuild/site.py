@@ -0,0 +1,39 @@
+"""
+The built site in _site/, for the post-build stages
+"""
+
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+
+from . import BASE_DIR
+from .collections import load_config
+
+# Jekyll's output directory
+SITE_DIR = '_site'
+
+
+def site_dir(base_dir=BASE_DIR):
+    return Path(base_dir) / SITE_DIR
+
+
+def base_url(base_dir=BASE_DIR):
+    """The site's baseurl from _config.yml, without a trailing slash"""
+    return (load_config(base_dir).get('baseurl') or '').rstrip('/')
+
+
+def html_pages(directory):
+    """Every built HTML page, in path order"""
+    return sorted(Path(directory).rglob('*.html'))
+
+
+def local_file(href, directory, baseurl=''):
+    """Return the file in the built site that a root-relative href points
+    to, or None for external URLs and missing files"""
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+        return None
+    path = unquote(parts.path)
+    if baseurl and path.startswith(baseurl + '/'):
+        path = path[len(baseurl):]
+    target = Path(directory) / path.lstrip('/')
+    return target if target.is_file() else None
@@ -0,0 +1,239 @@
+"""
+Sync data files from content/ to _data/ (and the built _site/content/)
+
+One-shot by default. With --watch it keeps running and re-syncs whenever
+a source file changes, waiting for a burst of edits to settle first.
+Only destinations whose content differs from their source are written,
+so an unchanged file never triggers a Jekyll rebuild.
+
+Usage: python3 -m sitebuild.sync [--watch] [--debounce SECONDS]
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+from pathlib import Path
+
+from . import BASE_DIR
+from .datafiles import data_file_pairs, is_in_sync
+from .files import atomic_write
+from .site import SITE_DIR
+
+
+def build_sync_map(base_dir=BASE_DIR):
+    """Return {source: [copies]} for the CMS data files in admin/config.yml.
+
+    Each content/ source is mirrored to _data/, and files Jekyll publishes
+    as-is (those outside underscore directories) also to _site/.
+    """
+    sync_map = {}
+    for src, dest in data_file_pairs(base_dir):
+        copies = sync_map.setdefault(src.as_posix(), [])
+        copies.append(dest.as_posix())
+        if not any(part.startswith('_') for part in src.parts):
+            copies.append((Path(SITE_DIR) / src).as_posix())
+    return sync_map
+
+
+def sync_once(sync_map, base_dir=BASE_DIR):
+    """Copy every changed source to its destinations; returns the paths written"""
+    base_dir = Path(base_dir)
+    site_built = (base_dir / SITE_DIR).is_dir()
+    written = []
+    for src_name, dest_names in sync_map.items():
+        src = base_dir / src_name
+        if not src.exists():
+            print(f"⚠️  Source not found: {src_name}")
+            continue
+        data = None
+        for dest_name in dest_names:
+            if dest_name.startswith(f'{SITE_DIR}/') and not site_built:
+                continue
+            dest = base_dir / dest_name
+            if is_in_sync(src, dest):
+                continue
+            if data is None:
+                data = src.read_bytes()
+            atomic_write(dest, data)
+            written.append(dest_name)
+            print(f"✓ Synced {src_name} → {dest_name}")
+    return written
+
+
+class InotifyWatcher:
+    """Watches directories for file changes with Linux inotify (via ctypes)"""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, paths, trees=()):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+
+        # Watch each source's directory, but only report its own file names;
+        # a tree reports every name, in every directory under it
+        self.names = {}
+        self.directories = {}
+        for path in paths:
+            wd = self._add_watch(path.parent)
+            names = self.names.setdefault(wd, set())
+            if names is not None:
+                names.add(os.fsencode(path.name))
+        for tree in trees:
+            self._watch_tree(tree)
+
+    def _add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"can't watch {directory}")
+        return wd
+
+    def _watch_tree(self, root):
+        for directory, _, _ in os.walk(root):
+            try:
+                wd = self._add_watch(directory)
+            except OSError:
+                # Removed while we were walking
+                continue
+            self.names[wd] = None
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """Block until a watched file changes; False if timeout expired first"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        changed = False
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return changed
+                raise
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = self.EVENT.unpack_from(buf, offset)
+                offset += self.EVENT.size
+                name = buf[offset:offset + length].rstrip(b'\0')
+                offset += length
+                names = self.names.get(wd, ())
+                if names is None:
+                    changed = True
+                    # New directory in a tree: watch it (and anything already in it) too
+                    if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._watch_tree(os.path.join(self.directories[wd], os.fsdecode(name)))
+                else:
+                    changed = changed or name in names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher for platforms without inotify: polls mtimes"""
+
+    def __init__(self, paths, trees=(), interval=0.5):
+        self.paths = list(paths)
+        self.trees = list(trees)
+        self.interval = interval
+        self.state = self._snapshot()
+
+    def _snapshot(self):
+        state = {}
+        paths = list(self.paths)
+        for tree in self.trees:
+            for directory, _, files in os.walk(tree):
+                paths += [os.path.join(directory, name) for name in files]
+        for path in paths:
+            try:
+                st = os.stat(path)
+                state[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                state[path] = None
+        return state
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._snapshot()
+            if state != self.state:
+                self.state = state
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.interval if deadline is None
+                       else max(0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, trees=()):
+    """Watch files, and whole directory trees; inotify where available, polling otherwise"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths, trees)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, trees)
+
+
+def watch(sync_map, base_dir=BASE_DIR, debounce=0.3):
+    """Sync, then re-sync after every settled burst of source changes"""
+    base_dir = Path(base_dir)
+    sync_once(sync_map, base_dir)
+    sources = [base_dir / name for name in sync_map if (base_dir / name).parent.is_dir()]
+    watcher = make_watcher(sources)
+    print(f"👀 Watching {len(sources)} data files ({type(watcher).__name__}), Ctrl+C to stop")
+    try:
+        while True:
+            if not watcher.wait():
+                continue
+            # Debounce: wait until edits have stopped for a moment
+            while watcher.wait(debounce):
+                pass
+            if not sync_once(sync_map, base_dir):
+                print("= No content changes")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync data files from content/ to _data/")
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help="keep running and sync whenever a source file changes")
+    parser.add_argument('--debounce', type=float, default=0.3, metavar='SECONDS',
+                        help="quiet period to wait for after a change before syncing (default: 0.3)")
+    args = parser.parse_args()
+
+    sync_map = build_sync_map()
+    if args.watch:
+        watch(sync_map, debounce=args.debounce)
+        return
+
+    print("Syncing data files from content/ to _data/...")
+    written = sync_once(sync_map)
+    if written:
+        print(f"✅ {len(written)} file(s) updated")
+    else:
+        print("✅ Everything already in sync")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""
+Check content against the CMS field definitions in admin/config.yml
+
+The CMS enforces its fields (widgets, required, min/max, patterns,
+select options) only while someone edits through it; files edited by
+hand or by scripts reach the build unchecked and show up as broken HTML.
+This compiles every collection's field list into a validator once and
+runs it over every folder collection document (_steps/, _faq/, ...),
+every file collection (_data/hero.json, ...) and its content/ mirror.
+Other _data/ files are checked to parse.
+
+Problems are errors (wrong type, out of range, missing required field,
+unparseable file, upload that doesn't exist) or warnings (required field
+present but empty, text where a string belongs). Errors fail the run,
+so build.sh stops before Jekyll; --strict fails on warnings too.
+
+Results are cached in .validate-cache.json against each file's digest
+and its collection's field definitions, so only changed files are
+checked again; large batches are checked across a process pool.
+
+Usage: python3 -m sitebuild.validate [--strict] [--force] [--jobs N]
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from datetime import date
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from . import BASE_DIR
+from .datafiles import load_cms_config, data_file_pairs
+from .digests import DigestCache
+from .frontmatter import parse_front_matter, yaml
+from .metrics import Metrics
+
+CACHE_NAME = '.validate-cache.json'
+ERROR, WARNING = 'error', 'warning'
+
+# Below this many files to check, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+
+# Schema key for _data/ files the CMS doesn't describe: they only have to parse
+PARSE_ONLY = ''
+
+# What a malformed file raises while being read
+PARSE_ERRORS = (ValueError, UnicodeDecodeError) + ((yaml.YAMLError,) if yaml is not None else ())
+
+TEXT_WIDGETS = ('string', 'text', 'markdown', 'code', 'color')
+MEDIA_WIDGETS = ('image', 'file')
+
+
+class Report:
+    """Problems found in one file, and the uploads it references"""
+
+    def __init__(self):
+        self.problems = []
+        self.media = []
+
+    def add(self, level, where, message):
+        self.problems.append([level, where, message])
+
+
+def describe(value):
+    text = repr(value)
+    return text if len(text) <= 40 else text[:37] + '...'
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_empty(value):
+    return value == '' or value == [] or value == {}
+
+
+def compile_field(field, media):
+    """Compile one field definition into check(value, where, report)"""
+    widget = field.get('widget', 'string')
+    low, high = field.get('min'), field.get('max')
+
+    if widget in TEXT_WIDGETS:
+        pattern = field.get('pattern')
+        regex = re.compile(pattern[0]) if isinstance(pattern, list) and pattern else None
+        message = pattern[1] if isinstance(pattern, list) and len(pattern) > 1 else f"must match {pattern}"
+
+        def check(value, where, report):
+            if isinstance(value, (list, dict)):
+                report.add(ERROR, where, f"expected text, got {describe(value)}")
+            elif not isinstance(value, str):
+                report.add(WARNING, where, f"expected text, got {describe(value)}")
+            elif regex and value and not regex.search(value):
+                report.add(ERROR, where, message)
+        return check
+
+    if widget == 'number':
+        value_type = field.get('value_type')
+
+        def check(value, where, report):
+            number = value
+            if isinstance(value, str) and value_type not in ('int', 'float'):
+                # Without value_type the CMS saves numbers as strings
+                try:
+                    number = float(value)
+                except ValueError:
+                    number = None
+            if not is_number(number):
+                report.add(ERROR, where, f"expected a number, got {describe(value)}")
+                return
+            if value_type == 'int' and not float(number).is_integer():
+                report.add(ERROR, where, f"expected a whole number, got {describe(value)}")
+            if low is not None and number < low:
+                report.add(ERROR, where, f"{number:g} is below the minimum of {low}")
+            if high is not None and number > high:
+                report.add(ERROR, where, f"{number:g} is above the maximum of {high}")
+        return check
+
+    if widget == 'boolean':
+        def check(value, where, report):
+            if not isinstance(value, bool):
+                report.add(ERROR, where, f"expected true or false, got {describe(value)}")
+        return check
+
+    if widget in MEDIA_WIDGETS:
+        base_dir, public, folder = media
+        prefix = public.rstrip('/') + '/'
+
+        def check(value, where, report):
+            if not isinstance(value, str):
+                report.add(ERROR, where, f"expected a file path, got {describe(value)}")
+            elif public and value.startswith(prefix):
+                path = f"{folder.strip('/')}/{value[len(prefix):]}"
+                report.media.append(path)
+                if not os.path.isfile(os.path.join(base_dir, path)):
+                    report.add(ERROR, where, f"{value} doesn't exist (expected {path})")
+        return check
+
+    if widget == 'select':
+        options = [option.get('value') if isinstance(option, dict) else option
+                   for option in field.get('options') or []]
+        multiple = field.get('multiple', False)
+
+        def check(value, where, report):
+            values = value if multiple and isinstance(value, list) else [value]
+            for item in values:
+                if item not in options:
+                    report.add(ERROR, where, f"{describe(item)} isn't one of {', '.join(map(str, options))}")
+        return check
+
+    if widget == 'datetime':
+        def check(value, where, report):
+            if not isinstance(value, (str, date)):
+                report.add(ERROR, where, f"expected a date, got {describe(value)}")
+        return check
+
+    if widget == 'object':
+        return compile_fields(field.get('fields') or [], media)
+
+    if widget == 'list':
+        if field.get('fields'):
+            item_check = compile_fields(field['fields'], media)
+        elif field.get('field'):
+            inner = field['field']
+            inner_check = compile_field(inner, media)
+
+            def item_check(value, where, report):
+                # Older CMS versions stored single-field items as {name: value}
+                if isinstance(value, dict) and list(value) == [inner.get('name')]:
+                    value = value[inner['name']]
+                inner_check(value, where, report)
+        else:
+            item_check = compile_field({'widget': 'string'}, media)
+
+        def check(value, where, report):
+            if isinstance(value, str) and not (field.get('field') or field.get('fields')):
+                # A plain list may be saved as comma-separated text
+                value = [item.strip() for item in value.split(',')]
+            if not isinstance(value, list):
+                report.add(ERROR, where, f"expected a list, got {describe(value)}")
+                return
+            if low is not None and len(value) < low:
+                report.add(ERROR, where, f"needs at least {low} item(s), has {len(value)}")
+            if high is not None and len(value) > high:
+                report.add(ERROR, where, f"allows at most {high} item(s), has {len(value)}")
+            for index, item in enumerate(value):
+                item_check(item, f'{where}[{index}]', report)
+        return check
+
+    # hidden, relation, map, ...: nothing we can check on our own
+    return lambda value, where, report: None
+
+
+def compile_fields(fields, media):
+    """Compile a field list into check(data, where, report) for a mapping"""
+    compiled = [(field['name'], field.get('required', True), compile_field(field, media))
+                for field in fields if field.get('name')]
+
+    def check(data, where, report):
+        if not isinstance(data, dict):
+            report.add(ERROR, where or '(file)', f"expected fields, got {describe(data)}")
+            return
+        for name, required, check_value in compiled:
+            path = f'{where}.{name}' if where else name
+            value = data.get(name)
+            if value is None:
+                if required:
+                    report.add(ERROR, path, "is required")
+                continue
+            if is_empty(value):
+                if required:
+                    report.add(WARNING, path, "is required but empty")
+                continue
+            check_value(value, path, report)
+    return check
+
+
+def schema_definitions(cms_config):
+    """{schema key: (format, field list)} for every collection and file entry"""
+    definitions = {}
+    for collection in cms_config.get('collections') or []:
+        if collection.get('folder'):
+            definitions[collection['name']] = (collection.get('format', 'yaml-frontmatter'),
+                                               collection.get('fields') or [])
+        for entry in collection.get('files') or []:
+            definitions[f"{collection['name']}/{entry['name']}"] = (None, entry.get('fields') or [])
+    return definitions
+
+
+def compile_schema(cms_config, base_dir=BASE_DIR):
+    """{schema key: check(data, where, report)}, compiled once per process"""
+    media = (str(base_dir), cms_config.get('public_folder', ''), cms_config.get('media_folder', ''))
+    return {key: compile_fields(fields, media)
+            for key, (_, fields) in schema_definitions(cms_config).items()}
+
+
+def fingerprints(cms_config):
+    """A digest of each schema's definition, so editing a collection's fields rechecks its files"""
+    media = [cms_config.get('public_folder'), cms_config.get('media_folder')]
+    return {key: hashlib.sha256(json.dumps([definition, media], sort_keys=True, default=str)
+                                .encode('utf-8')).hexdigest()[:16]
+            for key, definition in schema_definitions(cms_config).items()}
+
+
+def content_files(cms_config, base_dir=BASE_DIR):
+    """{relative path: schema key} for every file to check"""
+    base_dir = Path(base_dir)
+    files = {}
+    for collection in cms_config.get('collections') or []:
+        if collection.get('folder'):
+            folder = collection['folder'].strip('/')
+            suffix = '.' + collection.get('extension', 'md')
+            try:
+                names = sorted(entry.name for entry in os.scandir(base_dir / folder)
+                               if entry.name.endswith(suffix) and not entry.name.startswith('.'))
+            except OSError:
+                names = []
+            for name in names:
+                files[f'{folder}/{name}'] = collection['name']
+        for entry in collection.get('files') or []:
+            if entry.get('file'):
+                files[entry['file']] = f"{collection['name']}/{entry['name']}"
+    # The other side of each content/ <-> _data/ mirror follows the same schema
+    for source, mirror in data_file_pairs(base_dir, cms_config=cms_config):
+        for path, other in ((source.as_posix(), mirror.as_posix()), (mirror.as_posix(), source.as_posix())):
+            if other in files and path not in files:
+                files[path] = files[other]
+    data_dir = base_dir / '_data'
+    if data_dir.is_dir():
+        for path in sorted(data_dir.rglob('*')):
+            key = path.relative_to(base_dir).as_posix()
+            if path.suffix in ('.json', '.yml', '.yaml') and key not in files and path.is_file():
+                files[key] = PARSE_ONLY
+    return {path: key for path, key in files.items() if os.path.isfile(os.path.join(base_dir, path))}
+
+
+def parse_file(path, text, data_format):
+    if data_format in ('yaml-frontmatter', 'frontmatter'):
+        return parse_front_matter(text, path)[0]
+    if path.endswith('.json') or data_format == 'json':
+        return json.loads(text)
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read YAML files (pip install pyyaml)")
+    return yaml.safe_load(text)
+
+
+# Set in each process by init_worker
+_schema = {}
+_formats = {}
+
+
+def init_worker(cms_config, base_dir):
+    global _schema, _formats
+    _schema = compile_schema(cms_config, base_dir)
+    _formats = {key: data_format for key, (data_format, _) in schema_definitions(cms_config).items()}
+
+
+def check_file(job):
+    """Validate one file; returns (path, problems, media). Runs in a worker or in process."""
+    path, key, base_dir = job
+    report = Report()
+    try:
+        text = Path(base_dir, path).read_text(encoding='utf-8')
+        data = parse_file(path, text, _formats.get(key))
+    except PARSE_ERRORS as e:
+        report.add(ERROR, '(file)', "can't be parsed: " + ' '.join(str(e).split()))
+    else:
+        if key != PARSE_ONLY:
+            _schema[key](data, '', report)
+    return path, report.problems, report.media
+
+
+def media_state(base_dir, paths):
+    """{upload: exists?} for the uploads a file references; a change means checking it again"""
+    return {path: os.path.isfile(os.path.join(base_dir, path)) for path in paths}
+
+
+def validate_content(base_dir=BASE_DIR, jobs=None, force=False, metrics=None):
+    """Validate every content file; returns {path: problems} and a summary dict"""
+    base_dir = Path(base_dir)
+    metrics = metrics or Metrics()
+    cms_config = load_cms_config(base_dir)
+    with metrics.step('scan'):
+        files = content_files(cms_config, base_dir)
+        schemas = fingerprints(cms_config)
+        cache = DigestCache(base_dir / CACHE_NAME)
+        results, pending = {}, []
+        for path, key in files.items():
+            digest = cache.digest(path, os.path.join(base_dir, path))
+            entry = cache.get(path)
+            if (not force and entry and entry.get('digest') == digest
+                    and entry.get('schema') == schemas.get(key, PARSE_ONLY)
+                    and media_state(base_dir, entry.get('media', {})) == entry.get('media', {})):
+                results[path] = entry['problems']
+            else:
+                pending.append((path, key, digest))
+
+    with metrics.step('validate'):
+        jobs_list = [(path, key, str(base_dir)) for path, key, _ in pending]
+        if len(pending) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+            workers = jobs or os.cpu_count()
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(cms_config, str(base_dir))) as pool:
+                checked = list(pool.map(check_file, jobs_list, chunksize=max(1, len(jobs_list) // (workers * 4))))
+        else:
+            init_worker(cms_config, str(base_dir))
+            checked = [check_file(job) for job in jobs_list]
+        for (path, key, digest), (_, problems, media) in zip(pending, checked):
+            results[path] = problems
+            cache.update(path, base_dir / path, digest=digest, schema=schemas.get(key, PARSE_ONLY),
+                         problems=problems, media=media_state(base_dir, media))
+
+    for path in [path for path in cache.entries if path not in files]:
+        cache.remove(path)
+    cache.save()
+    summary = {'files': len(files), 'checked': len(pending),
+               'errors': sum(1 for problems in results.values() for p in problems if p[0] == ERROR),
+               'warnings': sum(1 for problems in results.values() for p in problems if p[0] == WARNING)}
+    return dict(sorted(results.items())), summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check content against the CMS field definitions")
+    parser.add_argument('--strict', action='store_true', help="fail on warnings too")
+    parser.add_argument('--force', action='store_true', help="check every file, ignoring the cache")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for large batches (default: one per CPU)")
+    args = parser.parse_args()
+
+    print("🔍 Validating content against admin/config.yml...")
+    results, summary = validate_content(jobs=max(1, args.jobs), force=args.force)
+    for path, problems in results.items():
+        for level, where, message in problems:
+            print(f"{'❌' if level == ERROR else '⚠️ '} {path}: {where}: {message}")
+    print(f"{'❌' if summary['errors'] else '✅'} {summary['files']} file(s), {summary['checked']} checked, "
+          f"{summary['errors']} error(s), {summary['warnings']} warning(s)")
+    if summary['errors'] or (args.strict and summary['warnings']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Service area lookups for scripts and support tools
+
+Loads content/service-areas.json once (singles, ranges and prefixes, see
+sitebuild.service_areas) into a 100,000-entry table so every lookup is a
+single index, and answers single or batch queries:
+
+    python3 -m sitebuild.zipcheck 94103 27604
+    python3 -m sitebuild.zipcheck --csv customers.csv --column zip --output checked.csv
+    python3 -m sitebuild.zipcheck --csv customers.csv --only unserved --output waitlist.csv
+    python3 -m sitebuild.zipcheck --benchmark 1000000
+
+From Python:
+
+    from sitebuild.zipcheck import ServiceArea
+    area = ServiceArea.load()
+    area.served('94103')
+"""
+
+import sys
+import csv
+import time
+import random
+import argparse
+from pathlib import Path
+
+from . import BASE_DIR
+from .service_areas import SOURCE, ZIP_COUNT, load_entries, normalise_intervals
+
+
+def parse_zip(value):
+    """Return a zip as an int, or None if it isn't one.
+
+    Accepts ints and strings, ZIP+4 ("94103-1234") and zips whose leading
+    zeros were lost by a spreadsheet ("501").
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if 0 <= value < ZIP_COUNT else None
+    value = str(value).strip().split('-', 1)[0]
+    # isdigit() alone also accepts '²', '③' and other digits int() rejects
+    if value.isascii() and value.isdigit() and len(value) <= 5:
+        return int(value)
+    return None
+
+
+class ServiceArea:
+    """Served zips as a table of one byte per possible zip"""
+
+    def __init__(self, intervals):
+        self.intervals = list(intervals)
+        table = bytearray(ZIP_COUNT)
+        for start, end in self.intervals:
+            table[start:end + 1] = b'\x01' * (end - start + 1)
+        self.table = bytes(table)
+
+    @classmethod
+    def load(cls, base_dir=BASE_DIR):
+        """Load the service area from content/service-areas.json"""
+        intervals, _ = normalise_intervals(load_entries(Path(base_dir) / SOURCE))
+        return cls(intervals)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.intervals)
+
+    def __contains__(self, zip_code):
+        return self.served(zip_code)
+
+    def served(self, zip_code):
+        """Check a single zip"""
+        number = parse_zip(zip_code)
+        return number is not None and self.table[number] == 1
+
+    def served_many(self, zip_codes):
+        """Check an iterable of zips, returning a list of bools"""
+        table = self.table
+        results = []
+        append = results.append
+        for value in zip_codes:
+            # Fast path for clean 5-digit strings, the common case
+            if type(value) is str and len(value) == 5 and value.isascii() and value.isdigit():
+                append(table[int(value)] == 1)
+            else:
+                number = parse_zip(value)
+                append(number is not None and table[number] == 1)
+        return results
+
+
+def check_csv(area, in_file, out_file, column='zip', only=None):
+    """Stream a CSV, adding a 'served' column or keeping only matching rows.
+
+    The column is 'yes', 'no', or 'invalid' when the cell isn't a zip;
+    invalid rows count as unserved for --only. Returns (rows read, rows
+    served, rows invalid).
+    """
+    reader = csv.reader(in_file)
+    writer = csv.writer(out_file)
+    header = next(reader, None)
+    if header is None:
+        return 0, 0, 0
+    try:
+        index = header.index(column)
+    except ValueError:
+        raise SystemExit(f"❌ Column '{column}' not found (columns: {', '.join(header)})")
+    writer.writerow(header if only else header + ['served'])
+
+    counts = (0, 0, 0)
+    batch = []
+    for row in reader:
+        batch.append(row)
+        if len(batch) == 65536:
+            counts = _write_batch(area, writer, batch, index, only, counts)
+            batch = []
+    return _write_batch(area, writer, batch, index, only, counts)
+
+
+def _write_batch(area, writer, rows, index, only, counts):
+    total, served_count, invalid_count = counts
+    values = [row[index] if index < len(row) else '' for row in rows]
+    results = area.served_many(values)
+    for row, value, served in zip(rows, values, results):
+        # Only unserved rows can be invalid, so served ones skip the second parse
+        invalid = not served and parse_zip(value) is None
+        invalid_count += invalid
+        if only is None:
+            writer.writerow(row + ['yes' if served else 'invalid' if invalid else 'no'])
+        elif served == (only == 'served'):
+            writer.writerow(row)
+    return total + len(rows), served_count + sum(results), invalid_count
+
+
+def benchmark(area, count):
+    """Time single and batch lookups over random zips"""
+    rng = random.Random(42)
+    zips = [f'{rng.randrange(ZIP_COUNT):05d}' for _ in range(count)]
+
+    start = time.perf_counter()
+    for zip_code in zips:
+        area.served(zip_code)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    served = sum(area.served_many(zips))
+    batch = time.perf_counter() - start
+
+    print(f"📈 {count:,} random zips, {served:,} served")
+    print(f"   served():      {single:.3f}s ({count / single:,.0f} lookups/s)")
+    print(f"   served_many(): {batch:.3f}s ({count / batch:,.0f} lookups/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check zips against the DeLitterUp service area")
+    parser.add_argument('zips', nargs='*', help="zip codes to check")
+    parser.add_argument('--csv', metavar='FILE', help="check a CSV file ('-' for stdin)")
+    parser.add_argument('--column', default='zip', help="CSV column holding the zip (default: zip)")
+    parser.add_argument('--output', '-o', metavar='FILE', help="write CSV results here (default: stdout)")
+    parser.add_argument('--only', choices=('served', 'unserved'),
+                        help="keep only served/unserved rows instead of adding a column")
+    parser.add_argument('--benchmark', nargs='?', type=int, const=1000000, metavar='N',
+                        help="measure lookups per second over N random zips (default: 1,000,000)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    area = ServiceArea.load()
+    load_time = time.perf_counter() - start
+
+    if args.benchmark:
+        print(f"🗺️  Loaded {len(area):,} zips in {load_time * 1000:.1f}ms")
+        benchmark(area, args.benchmark)
+        return
+
+    if args.csv:
+        in_file = sys.stdin if args.csv == '-' else open(args.csv, 'r', newline='', encoding='utf-8')
+        out_file = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+        try:
+            start = time.perf_counter()
+            total, served, invalid = check_csv(area, in_file, out_file, args.column, args.only)
+        finally:
+            if in_file is not sys.stdin:
+                in_file.close()
+            if out_file is not sys.stdout:
+                out_file.close()
+        print(f"✅ {total:,} rows checked, {served:,} served "
+              f"({time.perf_counter() - start:.2f}s)", file=sys.stderr)
+        if invalid:
+            print(f"⚠️  {invalid:,} row(s) without a valid zip", file=sys.stderr)
+        return
+
+    if not args.zips:
+        parser.error("give zip codes, --csv or --benchmark")
+    all_served = True
+    for zip_code in args.zips:
+        served = area.served(zip_code)
+        all_served = all_served and served
+        if parse_zip(zip_code) is None:
+            print(f"{zip_code}: ✗ not a valid zip")
+        else:
+            print(f"{zip_code}: {'✓ served' if served else '✗ not served'}")
+    sys.exit(0 if all_served else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,21 +2,17 @@
 # Sync data files from content/ to _data/
 # Run this if you manually edit files in content/ and need to update _data/
 # (The CMS will update both automatically via admin/config.yml)
+#
+# Only files whose content changed are copied. Pass --watch to keep
+# syncing while you edit.
 
-echo "Syncing data files from content/ to _data/..."
+cd "$(dirname "$0")" || exit 1
+python3 -m sitebuild.sync "$@" || exit 1
 
-cp content/hero.json _data/hero.json
-cp content/signup-form.json _data/signup-form.json
-cp content/_data/settings/general.json _data/settings/general.json
-
-echo "✅ Data files synced successfully!"
-echo ""
-echo "Files updated:"
-echo "  - _data/hero.json"
-echo "  - _data/signup-form.json"
-echo "  - _data/settings/general.json"
-echo ""
-echo "Don't forget to commit these changes:"
-echo "  git add _data/"
-echo "  git commit -m 'Update data files'"
-echo "  git push"
+if [ "$1" != "--watch" ] && [ "$1" != "-w" ]; then
+    echo ""
+    echo "Don't forget to commit these changes:"
+    echo "  git add _data/"
+    echo "  git commit -m 'Update data files'"
+    echo "  git push"
+fi